@@ -0,0 +1,35 @@
+import os
+import tempfile
+import time
+
+from pyeasyphd.main.pandoc_md_to import PandocMdTo
+
+if __name__ == "__main__":
+    path_output = tempfile.mkdtemp()
+
+    full_md = os.path.join(path_output, "note.md")
+    with open(full_md, "w") as f:
+        f.write("# Note\n\nAs shown in [@Key1; @Key5], the method works [@Key42].\n")
+
+    for number_entries in [1000, 10000, 50000]:
+        full_bib = os.path.join(path_output, f"library-{number_entries}.bib")
+        with open(full_bib, "w") as f:
+            for i in range(number_entries):
+                f.write(f"@article{{Key{i},\n  author = {{Smith, John and Doe, Jane}},\n")
+                f.write(f"  title = {{Title {i}}},\n  journal = {{Journal}},\n  year = {{{2000 + i % 25}}}\n}}\n\n")
+
+        for cited in [False, True]:
+            pandoc_md_to = PandocMdTo({"pandoc_cited_bibliography": cited})
+
+            start = time.perf_counter()
+            data_list = pandoc_md_to.pandoc_md_to_md(full_bib, path_output, path_output, "note.md", "out.md")
+            first = time.perf_counter() - start
+
+            start = time.perf_counter()
+            pandoc_md_to.pandoc_md_to_md(full_bib, path_output, path_output, "note.md", "out.md")
+            second = time.perf_counter() - start
+
+            print(
+                f"{number_entries:>6} entries, cited bibliography {cited!s:>5}: "
+                f"first run {first:.3f} s, second run {second:.3f} s, {len(data_list)} lines"
+            )
@@ -0,0 +1,28 @@
+import time
+
+from pyeasyphd.main.pandoc_md_to import PandocMdTo
+
+if __name__ == "__main__":
+    for markdown_name in ["pandoc-markdown", "multi-markdown"]:
+        pandoc_md_to = PandocMdTo({})
+        pandoc_md_to.markdown_name = markdown_name
+
+        for number_references in [1000, 5000, 10000, 20000]:
+            data_list = []
+            for i in range(number_references):
+                if markdown_name == "pandoc-markdown":
+                    data_list.extend([f"::: {{#ref-Key{i}\n", ".csl-entry}\n"])
+                else:
+                    data_list.append(f'<div id="ref-Key{i}" class="csl-entry" role="listitem">\n')
+                data_list.append(f"J. Smith and J. Doe, “Title {i},” *Journal*, vol. {i % 40}, {2000 + i % 25},\n")
+                data_list.append(f"doi: [10.1000/{i}](https://doi.org/10.1000/{i}).\n")
+                data_list.append(":::\n\n" if markdown_name == "pandoc-markdown" else "</div>\n\n")
+
+            start = time.perf_counter()
+            key_reference_dict = pandoc_md_to._generate_citation_key_reference_dict_from_pandoc_md(data_list)
+            elapsed = time.perf_counter() - start
+
+            print(
+                f"{markdown_name:>15}, {number_references:>6} references: {elapsed:.3f} s, "
+                f"{elapsed / number_references * 1e6:.2f} us per reference, {len(key_reference_dict)} parsed"
+            )
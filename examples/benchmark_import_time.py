@@ -0,0 +1,33 @@
+import re
+import subprocess
+import sys
+
+# Top-level entry of `python -X importtime`: self and cumulative microseconds, then the module name
+_REGEX_IMPORT_TIME = re.compile(r"^import time:\s*\d+\s*\|\s*(\d+)\s*\|\s(\S+)$")
+
+
+def import_time_ms(statement: str, repeat: int = 5) -> float:
+    """Best cumulative import time of a statement, in a fresh interpreter, without the startup imports."""
+    times = []
+    for _ in range(repeat):
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True
+        ).stderr
+        times.append(sum(int(m.group(1)) for line in stderr.splitlines() if (m := _REGEX_IMPORT_TIME.match(line))))
+    return min(times) / 1000
+
+
+if __name__ == "__main__":
+    statements = [
+        "import pyeasyphd.main",
+        "import pyeasyphd.tools",
+        "import pyeasyphd.scripts",
+        "from pyeasyphd.scripts import run_replace_to_standard_cite_keys",
+        "from pyeasyphd.scripts import run_article_md_daily_notes",
+        "from pyeasyphd.tools import PyRunBibMdTex",
+        "from pyeasyphd.scripts import run_search_for_screen",
+    ]
+
+    baseline = import_time_ms("pass")
+    for statement in statements:
+        print(f"{import_time_ms(statement) - baseline:8.1f} ms  {statement}")
@@ -0,0 +1,44 @@
+import os
+import statistics
+import tempfile
+import time
+
+from pyeasyphd.main.pandoc_md_to import PandocMdTo
+
+if __name__ == "__main__":
+    number_documents = 50
+    path_output = tempfile.mkdtemp()
+
+    full_bib = os.path.join(path_output, "references.bib")
+    with open(full_bib, "w") as f:
+        f.write("@article{Smith2020,\n  author = {Smith, John},\n  title = {A Title},\n")
+        f.write("  journal = {A Journal},\n  year = {2020}\n}\n")
+
+    for i in range(number_documents):
+        with open(os.path.join(path_output, f"note-{i}.md"), "w") as f:
+            f.write(f"# Note {i}\n\nAs shown in [@Smith2020], the method works.\n")
+
+    results = {}
+    for backend in ["cli", "server"]:
+        pandoc_md_to = PandocMdTo({"pandoc_backend": backend})
+        pandoc_md_to._pandoc_md_to_html(
+            os.path.join(path_output, "note-0.md"), os.path.join(path_output, "warm.html")
+        )  # start the server
+
+        latencies, outputs = [], []
+        for i in range(number_documents):
+            start = time.perf_counter()
+            outputs.append(
+                pandoc_md_to.pandoc_md_to_md(
+                    full_bib, path_output, os.path.join(path_output, backend), f"note-{i}.md", f"note-{i}.md"
+                )
+            )
+            latencies.append(time.perf_counter() - start)
+        results[backend] = outputs
+
+        print(
+            f"{backend:>6}: mean {statistics.mean(latencies) * 1000:.1f} ms, "
+            f"median {statistics.median(latencies) * 1000:.1f} ms per document"
+        )
+
+    print("Identical outputs:", results["cli"] == results["server"])
@@ -1,6 +1,22 @@
+from typing import TYPE_CHECKING
+
+from ..utils.lazy_imports import lazy_module_attributes
+
 __all__ = ["BasicInput", "PandocMdTo", "PythonRunMd", "PythonRunTex"]
 
-from .basic_input import BasicInput
-from .pandoc_md_to import PandocMdTo
-from .python_run_md import PythonRunMd
-from .python_run_tex import PythonRunTex
+# Class -> submodule defining it, imported on first access
+_LAZY_IMPORTS = {
+    "BasicInput": ".basic_input",
+    "PandocMdTo": ".pandoc_md_to",
+    "PythonRunMd": ".python_run_md",
+    "PythonRunTex": ".python_run_tex",
+}
+
+if TYPE_CHECKING:
+    from .basic_input import BasicInput
+    from .pandoc_md_to import PandocMdTo
+    from .python_run_md import PythonRunMd
+    from .python_run_tex import PythonRunTex
+
+
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_IMPORTS, __all__)
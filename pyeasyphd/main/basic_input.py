@@ -4,6 +4,32 @@ from typing import Any
 from pyadvtools import read_list
 from pybibtexer.main import BasicInput as BasicInputInPyBibtexer
 
+# Template files shared by all instances: full path -> (mtime, size, lines)
+_TEMPLATE_CACHE: dict[str, tuple[int, int, tuple[str, ...]]] = {}
+
+
+def read_template(full_file: str) -> tuple[str, ...]:
+    """Lines of a template file, read once per process and again only after the file changed.
+
+    Args:
+        full_file (str): Full path of the template file.
+
+    Returns:
+        tuple[str, ...]: Lines of the file, shared by all callers, or () if the file does not exist.
+    """
+    try:
+        stat = os.stat(full_file)
+    except FileNotFoundError:
+        return ()
+
+    cached = _TEMPLATE_CACHE.get(full_file)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    data_list = tuple(read_list(full_file))
+    _TEMPLATE_CACHE[full_file] = (stat.st_mtime_ns, stat.st_size, data_list)
+    return data_list
+
 
 class BasicInput(BasicInputInPyBibtexer):
     """Basic input class for handling bibliography and template configurations.
@@ -15,13 +41,13 @@ class BasicInput(BasicInputInPyBibtexer):
         full_csl_style_pandoc (str): Full path to CSL style for pandoc.
         full_tex_article_template_pandoc (str): Full path to tex article template for pandoc.
         full_tex_beamer_template_pandoc (str): Full path to tex beamer template for pandoc.
-        article_template_tex (list[str]): Article template for LaTeX.
-        article_template_header_tex (list[str]): Article template header for LaTeX.
-        article_template_tail_tex (list[str]): Article template tail for LaTeX.
-        beamer_template_header_tex (list[str]): Beamer template header for LaTeX.
-        beamer_template_tail_tex (list[str]): Beamer template tail for LaTeX.
-        math_commands_tex (list[str]): LaTeX math commands.
-        usepackages_tex (list[str]): LaTeX usepackages.
+        article_template_tex (tuple[str, ...]): Article template for LaTeX.
+        article_template_header_tex (tuple[str, ...]): Article template header for LaTeX.
+        article_template_tail_tex (tuple[str, ...]): Article template tail for LaTeX.
+        beamer_template_header_tex (tuple[str, ...]): Beamer template header for LaTeX.
+        beamer_template_tail_tex (tuple[str, ...]): Beamer template tail for LaTeX.
+        math_commands_tex (tuple[str, ...]): LaTeX math commands.
+        usepackages_tex (tuple[str, ...]): LaTeX usepackages.
         handly_preamble (bool): Whether to handle preamble manually.
         options (dict[str, Any]): Configuration options.
     """
@@ -77,11 +103,11 @@ class BasicInput(BasicInputInPyBibtexer):
         # handly preamble
         self.handly_preamble = options.get("handly_preamble", False)
         if self.handly_preamble:
-            self.article_template_header_tex, self.article_template_tail_tex = [], []
-            self.beamer_template_header_tex, self.beamer_template_tail_tex = [], []
-            self.math_commands_tex, self.usepackages_tex = [], []
+            self.article_template_header_tex, self.article_template_tail_tex = (), ()
+            self.beamer_template_header_tex, self.beamer_template_tail_tex = (), ()
+            self.math_commands_tex, self.usepackages_tex = (), ()
 
-    def _try_read_list(self, folder_name: str, file_name: str):
+    def _try_read_list(self, folder_name: str, file_name: str) -> tuple[str, ...]:
         """Try to read a list from a file in the templates directory.
 
         Args:
@@ -89,13 +115,13 @@ class BasicInput(BasicInputInPyBibtexer):
             file_name (str): Name of the file to read.
 
         Returns:
-            list[str]: list of lines from the file, or empty list if file cannot be read.
+            tuple[str, ...]: Lines from the file (cached, see `read_template`), or () if file cannot be read.
         """
         path_file = os.path.join(self._path_templates, folder_name, file_name)
 
         try:
-            data_list = read_list(path_file)
+            data_list = read_template(path_file)
         except Exception as e:
             print(e)
-            data_list = []
+            data_list = ()
         return data_list
@@ -0,0 +1,450 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+from .pandoc_backends import _pandoc_semaphore
+from .toolchain import default_cache_path, probe_toolchain
+
+_REGEX_BEGIN_DOCUMENT = re.compile(r"^\s*\\begin\{document\}")
+# Bibliography files read by biber, which are missing from the `.fls` of the engine
+_REGEX_BCF_DATASOURCE = re.compile(r"<bcf:datasource[^>]*>([^<]+)</bcf:datasource>")
+
+
+def latex_build_path(path_root: str, full_main: str) -> str:
+    """Persistent build directory of a document.
+
+    Args:
+        path_root (str): Directory holding the build directories of all documents.
+        full_main (str): Full path of the document (such as the output pdf), which identifies the build.
+
+    Returns:
+        str: Full path of the build directory, such as `<path_root>/<name>-<hash>`.
+    """
+    name = os.path.splitext(os.path.basename(full_main))[0]
+    sha = hashlib.sha256(os.path.abspath(full_main).encode("utf-8")).hexdigest()
+    return os.path.join(path_root, f"{name}-{sha[:12]}")
+
+
+def latexmk_cmd(full_tex: str, engine: str, path_build: str, full_fmt: str = "") -> list[str]:
+    """Command compiling a tex file with latexmk, keeping aux, toc and pdf files in `path_build`.
+
+    Args:
+        full_tex (str): Full path of the main tex file.
+        engine (str): "xelatex", "pdflatex" or "lualatex".
+        path_build (str): Output directory of latexmk.
+        full_fmt (str): Full path of a precompiled format without `.fmt`, loaded instead of the default one.
+            Defaults to "".
+
+    Returns:
+        list[str]: Command and arguments.
+    """
+    cmd = ["latexmk", f"-{engine}"]
+    if full_fmt:
+        cmd.append(f'-{engine}={engine} -fmt="{full_fmt}" %O %S')
+    cmd.extend(["-interaction=nonstopmode", "-halt-on-error", "-file-line-error", f"-outdir={path_build}", full_tex])
+    return cmd
+
+
+def split_preamble(data_list: list[str]) -> list[str]:
+    r"""Lines of a tex document before `\begin{document}`, or [] without such a line."""
+    for i, line in enumerate(data_list):
+        if _REGEX_BEGIN_DOCUMENT.match(line):
+            return data_list[:i]
+    return []
+
+
+_FORMAT_LOCKS: dict[str, threading.Lock] = {}
+_FORMAT_LOCKS_LOCK = threading.Lock()
+# Directories of the TeX distribution, whose files change only with the engine
+_TEX_TREE_VARIABLES = ("TEXMFDIST", "TEXMFMAIN", "TEXMFSYSVAR", "TEXMFSYSCONFIG", "TEXMFLOCAL")
+_TEX_TREES: list[str] | None = None
+
+
+def _kpsewhich(args: list[str], cwd: str | None = None) -> str:
+    try:
+        process = subprocess.run(["kpsewhich", *args], capture_output=True, text=True, cwd=cwd, check=False)
+    except OSError:
+        return ""
+    return process.stdout.strip() if process.returncode == 0 else ""
+
+
+def _tex_trees() -> list[str]:
+    global _TEX_TREES
+    if _TEX_TREES is None:
+        values = _kpsewhich(["-expand-var=" + "|".join(f"${x}" for x in _TEX_TREE_VARIABLES)]).split("|")
+        _TEX_TREES = [os.path.normpath(x) for x in values if x and os.path.isdir(x)]
+    return _TEX_TREES
+
+
+def latex_preamble_format(
+    preamble: list[str], engine: str, path_cache: str = "", cwd: str | None = None, timeout: float | None = None
+) -> str:
+    r"""Precompiled format of a preamble, dumped once with mylatexformat and cached by preamble and engine.
+
+    A document compiled with the format skips its own preamble up to `\begin{document}`. The key covers the
+    preamble lines, the path, mtime and version of the engine, and the path and mtime of mylatexformat. The
+    files the dump read outside the TeX distribution (such as own packages) are recorded with the mtime, size
+    and hash of the `.fls` of the dump, and the format is dumped again once one of them changed. A failed dump
+    (such as with fonts which cannot be dumped) is remembered by a `.failed` file with its log, so the
+    document is compiled normally without trying again until mylatexformat or such a file changed.
+
+    Args:
+        preamble (list[str]): Lines before `\begin{document}`.
+        engine (str): "xelatex", "pdflatex" or "lualatex".
+        path_cache (str): Directory of the formats. Defaults to "" (`latex-formats` in `default_cache_path()`).
+        cwd (str | None): Working directory of the dump, where relative paths of the preamble are resolved.
+            Defaults to None (the current directory).
+        timeout (float | None): Seconds before the dump is stopped. Defaults to None (no limit).
+
+    Returns:
+        str: Full path of the format without `.fmt`, or "" if it could not be dumped.
+    """
+    path_cache = path_cache or os.path.join(default_cache_path(), "latex-formats")
+    info = probe_toolchain().get(engine, {})
+    key = [engine, info.get("path", ""), info.get("mtime", 0.0), info.get("version", "")]
+    if full_ltx := _kpsewhich(["mylatexformat.ltx"], cwd):
+        key.extend([full_ltx, os.path.getmtime(full_ltx)])
+    name = f"{engine}-{hashlib.sha256(json.dumps([*key, preamble]).encode('utf-8')).hexdigest()[:16]}"
+    full_name = os.path.join(path_cache, name)
+
+    with _FORMAT_LOCKS_LOCK:
+        lock = _FORMAT_LOCKS.setdefault(name, threading.Lock())
+    with lock:
+        if os.path.exists(full_name + ".fmt") or os.path.exists(full_name + ".failed"):
+            try:
+                with open(full_name + ".inputs.json", encoding="utf-8") as f:
+                    unchanged = _inputs_unchanged(json.load(f))
+            except (OSError, ValueError):
+                unchanged = False
+            if unchanged:
+                return full_name if os.path.exists(full_name + ".fmt") else ""
+            for postfix in (".fmt", ".failed"):
+                if os.path.exists(full_name + postfix):
+                    os.remove(full_name + postfix)
+
+        os.makedirs(path_cache, exist_ok=True)
+        path_dump = tempfile.mkdtemp(prefix=f"{name}-", dir=path_cache)
+        try:
+            full_preamble = os.path.join(path_dump, f"{name}.tex")
+            with open(full_preamble, "w", encoding="utf-8", newline="\n") as f:
+                f.writelines([*preamble, "\\begin{document}\n", "\\end{document}\n"])
+
+            cmd = [engine, "-ini", "-recorder", "-interaction=nonstopmode", "-halt-on-error", f"-jobname={name}"]
+            cmd.extend([f"-output-directory={path_dump}", f"&{engine}", "mylatexformat.ltx", full_preamble])
+            try:
+                process = subprocess.run(
+                    cmd, stdin=subprocess.DEVNULL, capture_output=True, cwd=cwd, timeout=timeout, check=False
+                )
+                log = process.stdout.decode("utf-8", errors="replace")
+                success = process.returncode == 0 and os.path.exists(os.path.join(path_dump, f"{name}.fmt"))
+            except (OSError, subprocess.TimeoutExpired) as e:
+                log, success = str(e), False
+
+            # files of the distribution change with the engine of the key, the dump files are not kept
+            inputs = _fls_inputs(os.path.join(path_dump, f"{name}.fls"), cwd or os.getcwd())
+            inputs = [x for x in inputs if not x.startswith((path_dump + os.sep, *(y + os.sep for y in _tex_trees())))]
+            with open(full_name + ".inputs.json", "w", encoding="utf-8") as f:
+                json.dump(_input_stats(inputs), f, indent=4)
+
+            if success:
+                os.replace(os.path.join(path_dump, f"{name}.fmt"), full_name + ".fmt")
+                return full_name
+
+            with open(full_name + ".failed", "w", encoding="utf-8") as f:
+                f.write(log)
+            print(f"Precompiled preamble for {engine} failed, compiling without it (see {full_name}.failed).")
+            return ""
+        finally:
+            shutil.rmtree(path_dump, ignore_errors=True)
+
+
+def discard_preamble_format(full_fmt: str, log: str) -> None:
+    """Replace a format, which a document failed to compile with, by the `.failed` file of `latex_preamble_format`.
+
+    Args:
+        full_fmt (str): Full path of the format without `.fmt`.
+        log (str): Log of the failed compilation, kept in the `.failed` file.
+    """
+    with _FORMAT_LOCKS_LOCK:
+        lock = _FORMAT_LOCKS.setdefault(os.path.basename(full_fmt), threading.Lock())
+    with lock:
+        with open(full_fmt + ".failed", "w", encoding="utf-8") as f:
+            f.write(log)
+        if os.path.exists(full_fmt + ".fmt"):
+            os.remove(full_fmt + ".fmt")
+    return None
+
+
+def run_latexmk(
+    full_tex: str, engine: str, path_build: str, cwd: str | None = None, timeout: float | None = None
+) -> bool:
+    r"""Run latexmk and print its log on failure.
+
+    Args:
+        full_tex (str): Full path of the main tex file.
+        engine (str): "xelatex", "pdflatex" or "lualatex".
+        path_build (str): Output directory of latexmk.
+        cwd (str | None): Working directory, where relative `\includegraphics` and `\input` paths are
+            resolved. Defaults to None (the current directory).
+        timeout (float | None): Seconds before latexmk is killed. Defaults to None (no limit).
+
+    Returns:
+        bool: Whether the compilation succeeded.
+    """
+    return compile_latex(LatexJob(full_tex, engine, path_build, cwd, timeout)).success
+
+
+class LatexJob:
+    """One latexmk compilation.
+
+    Args:
+        full_tex (str): Full path of the main tex file.
+        engine (str): "xelatex", "pdflatex" or "lualatex".
+        path_build (str): Output directory of latexmk.
+        cwd (str | None): Working directory of latexmk. Defaults to None (the current directory).
+        timeout (float | None): Seconds before latexmk is killed. Defaults to None (no limit).
+        full_fmt (str): Full path of a precompiled preamble format without `.fmt`. Defaults to "" (none).
+        incremental (bool): Whether to skip the compilation when the build record of `path_build` shows that
+            no input changed, and to write the record after a compilation. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        full_tex: str,
+        engine: str,
+        path_build: str,
+        cwd: str | None = None,
+        timeout: float | None = None,
+        full_fmt: str = "",
+        incremental: bool = False,
+    ) -> None:
+        self.full_tex = full_tex
+        self.engine = engine
+        self.path_build = path_build
+        self.cwd = cwd
+        self.timeout = timeout
+        self.full_fmt = full_fmt
+        self.incremental = incremental
+
+    def output(self, postfix: str) -> str:
+        """Full path of an output of latexmk, such as `output(".pdf")`."""
+        return os.path.join(self.path_build, os.path.splitext(os.path.basename(self.full_tex))[0] + postfix)
+
+
+class LatexResult:
+    """Outcome of a `LatexJob`.
+
+    Attributes:
+        job (LatexJob): The compilation.
+        success (bool): Whether latexmk succeeded within the timeout.
+        log (str): Captured stdout and stderr of latexmk.
+        seconds (float): Duration of the compilation.
+        skipped (bool): Whether the compilation was skipped because no input changed.
+    """
+
+    def __init__(self, job: LatexJob, success: bool, log: str, seconds: float, skipped: bool = False) -> None:
+        self.job = job
+        self.success = success
+        self.log = log
+        self.seconds = seconds
+        self.skipped = skipped
+
+
+def compile_latex(job: LatexJob) -> LatexResult:
+    """Run the latexmk command of a job and print the end of its log on failure.
+
+    latexmk runs in its own process group, so on timeout the engine it started is killed as well. A job failing
+    with a precompiled preamble format runs once more without it, and the format is marked as failed.
+
+    Args:
+        job (LatexJob): The compilation.
+
+    Returns:
+        LatexResult: Outcome with the captured log.
+    """
+    if job.incremental and latex_build_up_to_date(job):
+        return LatexResult(job, True, "", 0.0, True)
+
+    os.makedirs(job.path_build, exist_ok=True)
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        latexmk_cmd(job.full_tex, job.engine, job.path_build, job.full_fmt),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        cwd=job.cwd,
+        start_new_session=os.name == "posix",
+    )
+    try:
+        stdout, _ = process.communicate(timeout=job.timeout)
+        timed_out = False
+    except subprocess.TimeoutExpired:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+        stdout, _ = process.communicate()
+        timed_out = True
+
+    log = stdout.decode("utf-8", errors="replace")
+    result = LatexResult(job, (not timed_out) and process.returncode == 0, log, time.perf_counter() - start)
+    if not (result.success or timed_out) and job.full_fmt:
+        # the format may not fit the document (such as fonts set up at load time), so it is not used again
+        discard_preamble_format(job.full_fmt, log)
+        print(f"Error in Run LaTex with {job.full_fmt}.fmt, compiling without it (see {job.full_fmt}.failed).")
+        return compile_latex(
+            LatexJob(job.full_tex, job.engine, job.path_build, job.cwd, job.timeout, "", job.incremental)
+        )
+    if timed_out:
+        print(f"Error in Run LaTex: {job.full_tex} timed out after {job.timeout} s.", log[-2000:])
+    elif not result.success:
+        print("Error in Run LaTex:", log[-2000:])
+    elif job.incremental:
+        write_latex_build_record(job)
+    return result
+
+
+def _latex_build_key(job: LatexJob) -> list:
+    info = probe_toolchain().get(job.engine, {})
+    cmd = latexmk_cmd(job.full_tex, job.engine, job.path_build, job.full_fmt)
+    return [cmd, job.cwd or "", info.get("path", ""), info.get("mtime", 0.0), info.get("version", "")]
+
+
+def _latex_build_inputs(job: LatexJob) -> list[str]:
+    """Sources read by the last compilation: the inputs of the `.fls` and the bibliography files of the `.bcf`.
+
+    Files in the build directory (aux, bbl, toc) are derived from the sources and left out.
+    """
+    path_build = os.path.abspath(job.path_build)
+    cwd = job.cwd or os.getcwd()
+
+    if not (inputs := set(_fls_inputs(job.output(".fls"), cwd))):
+        return []
+
+    try:
+        with open(job.output(".bcf"), encoding="utf-8", errors="replace") as f:
+            inputs.update(
+                os.path.normpath(os.path.join(cwd, x.strip())) for x in _REGEX_BCF_DATASOURCE.findall(f.read())
+            )
+    except OSError:
+        pass
+    return sorted(x for x in inputs if os.path.dirname(x) != path_build)
+
+
+def _fls_inputs(full_fls: str, cwd: str) -> list[str]:
+    """Full paths of the `INPUT` files of a `.fls` recorder file, [] if it cannot be read."""
+    inputs = []
+    try:
+        with open(full_fls, encoding="utf-8", errors="replace") as f:
+            pwd = cwd
+            for line in f:
+                if line.startswith("PWD "):
+                    pwd = line[4:].rstrip("\n")
+                elif line.startswith("INPUT "):
+                    inputs.append(os.path.normpath(os.path.join(pwd, line[6:].rstrip("\n"))))
+    except OSError:
+        return []
+    return sorted(set(inputs))
+
+
+def _input_stats(full_files: list[str]) -> dict[str, list]:
+    """The mtime, size and hash of existing files."""
+    stats = {}
+    for full_file in full_files:
+        try:
+            stat = os.stat(full_file)
+            stats[full_file] = [stat.st_mtime_ns, stat.st_size, _file_sha256(full_file)]
+        except OSError:
+            continue
+    return stats
+
+
+def _inputs_unchanged(stats: dict[str, list]) -> bool:
+    """Whether files have the contents of `_input_stats`; a file is only read again if its mtime or size changed."""
+    for full_file, (mtime_ns, size, sha) in stats.items():
+        try:
+            stat = os.stat(full_file)
+        except OSError:
+            return False
+        if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+            continue
+        if stat.st_size != size or _file_sha256(full_file) != sha:
+            return False
+    return True
+
+
+def _file_sha256(full_file: str) -> str:
+    sha = hashlib.sha256()
+    with open(full_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def latex_build_up_to_date(job: LatexJob) -> bool:
+    """Whether the build record of a job shows the same command, engine and input contents, and the pdf exists.
+
+    An input whose mtime and size are unchanged is not read again; otherwise its hash is compared, so touched
+    but unchanged files do not trigger a compilation.
+
+    Args:
+        job (LatexJob): The compilation.
+
+    Returns:
+        bool: Whether the compilation can be skipped.
+    """
+    try:
+        with open(job.output(".build.json"), encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    if record.get("key") != _latex_build_key(job) or not os.path.exists(job.output(".pdf")):
+        return False
+    return _inputs_unchanged(record.get("inputs", {}))
+
+
+def write_latex_build_record(job: LatexJob) -> None:
+    """Record the command, engine and the mtime, size and hash of every input of the last compilation.
+
+    Args:
+        job (LatexJob): The compilation.
+    """
+    if not (
+        inputs := _input_stats(_latex_build_inputs(job))
+    ):  # without recorder output, the next run cannot be skipped safely
+        return None
+
+    full_record = job.output(".build.json")
+    with open(full_record + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"key": _latex_build_key(job), "inputs": inputs}, f, indent=4)
+    os.replace(full_record + ".tmp", full_record)
+    return None
+
+
+async def run_latexmk_async(full_tex: str, engine: str, path_build: str, cwd: str | None = None) -> bool:
+    """Awaitable counterpart of `run_latexmk`, bounded by the shared limit of pandoc conversions."""
+    os.makedirs(path_build, exist_ok=True)
+    async with _pandoc_semaphore():
+        process = await asyncio.create_subprocess_exec(
+            *latexmk_cmd(full_tex, engine, path_build),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+        )
+        stdout, stderr = await process.communicate()
+
+    if process.returncode != 0:
+        print(
+            "Error in Run LaTex:", stdout.decode("utf-8", errors="replace")[-2000:], stderr.decode("utf-8", "replace")
+        )
+        return False
+    return True
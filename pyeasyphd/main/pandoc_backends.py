@@ -0,0 +1,427 @@
+import asyncio
+import atexit
+import base64
+import hashlib
+import http.client
+import json
+import os
+import re
+import socket
+import subprocess
+import threading
+import time
+import weakref
+from typing import ClassVar
+
+from .toolchain import has_pandoc_feature, has_tool, probe_toolchain, report_missing
+
+# ASCII punctuation, which markdown parses unless escaped
+_REGEX_MARKDOWN_PUNCTUATION = re.compile(r"([!-/:-@\[-`{-~])")
+
+# Shared limit of concurrently running pandoc conversions of the async API
+_PANDOC_MAX_CONCURRENCY: int = os.cpu_count() or 1
+_PANDOC_SEMAPHORES: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def set_pandoc_max_concurrency(max_concurrency: int | None) -> None:
+    """Set the shared limit of concurrently running pandoc conversions.
+
+    Args:
+        max_concurrency (int | None): Maximum number of conversions. None means the CPU count.
+    """
+    global _PANDOC_MAX_CONCURRENCY
+    _PANDOC_MAX_CONCURRENCY = max(1, max_concurrency or os.cpu_count() or 1)
+    _PANDOC_SEMAPHORES.clear()
+    return None
+
+
+def _pandoc_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if (semaphore := _PANDOC_SEMAPHORES.get(loop)) is None:
+        semaphore = _PANDOC_SEMAPHORES[loop] = asyncio.Semaphore(_PANDOC_MAX_CONCURRENCY)
+    return semaphore
+
+
+def run_pandoc(cmd: list[str], error_flag: str) -> None:
+    """Run a pandoc command and print its stderr on failure.
+
+    Args:
+        cmd (list[str]): Command and arguments.
+        error_flag (str): Conversion name used in the error message, such as "pandoc md to md".
+    """
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Pandoc error in {error_flag}:", e.stderr)
+    return None
+
+
+def run_pandoc_piped(cmd: list[str], text: str, error_flag: str) -> str:
+    """Run a pandoc command reading `text` from stdin and return its stdout.
+
+    Args:
+        cmd (list[str]): Command and arguments, without input file and `-o`.
+        text (str): Input text.
+        error_flag (str): Conversion name used in the error message, such as "pandoc md to md".
+
+    Returns:
+        str: Output text, or "" on failure.
+    """
+    try:
+        result = subprocess.run(cmd, input=text, check=True, capture_output=True, text=True, encoding="utf-8")
+    except subprocess.CalledProcessError as e:
+        print(f"Pandoc error in {error_flag}:", e.stderr)
+        return ""
+    return result.stdout
+
+
+async def run_pandoc_async(cmd: list[str], error_flag: str) -> None:
+    """Awaitable counterpart of `run_pandoc`, bounded by the shared concurrency limit.
+
+    Args:
+        cmd (list[str]): Command and arguments.
+        error_flag (str): Conversion name used in the error message, such as "pandoc md to md".
+    """
+    async with _pandoc_semaphore():
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+
+    if process.returncode != 0:
+        print(f"Pandoc error in {error_flag}:", stderr.decode("utf-8", errors="replace"))
+    return None
+
+
+def check_pandoc_cmd(cmd: list[str]) -> list[str] | None:
+    """Adapt a pandoc command to the installed toolchain.
+
+    Args:
+        cmd (list[str]): Command and arguments.
+
+    Returns:
+        list[str] | None: Command to run, or None if it cannot succeed (a message is printed once).
+    """
+    if not has_tool("pandoc"):
+        report_missing("pandoc", "pandoc not found. Please install pandoc.")
+        return None
+
+    if "--citeproc" in cmd and not has_pandoc_feature("citeproc"):
+        if not has_tool("pandoc-citeproc"):
+            report_missing(
+                "citeproc", "pandoc without --citeproc and pandoc-citeproc not found. Please upgrade pandoc."
+            )
+            return None
+        i = cmd.index("--citeproc")
+        cmd = [*cmd[:i], "--filter", "pandoc-citeproc", *cmd[i + 1 :]]
+
+    for arg in cmd:
+        engine = arg.split("=", 1)[1] if arg.startswith("--pdf-engine=") else ""
+        if engine and engine not in probe_toolchain()["pandoc"]["features"]["pdf_engines"]:
+            report_missing(engine, f"{engine} not found. Please install Texlive.")
+            return None
+    return cmd
+
+
+class PandocCliBackend:
+    """Run every conversion as a one-shot pandoc process."""
+
+    name = "cli"
+
+    def run(self, cmd: list[str], error_flag: str) -> None:
+        if (cmd := check_pandoc_cmd(cmd)) is not None:
+            run_pandoc(cmd, error_flag)
+        return None
+
+    async def run_async(self, cmd: list[str], error_flag: str) -> None:
+        if (cmd := check_pandoc_cmd(cmd)) is not None:
+            await run_pandoc_async(cmd, error_flag)
+        return None
+
+    def run_piped(self, cmd: list[str], text: str, error_flag: str) -> str:
+        if (cmd := check_pandoc_cmd(cmd)) is None:
+            return ""
+        return run_pandoc_piped(cmd, text, error_flag)
+
+
+class PandocServer:
+    """A local `pandoc server` process spawned and supervised by pyeasyphd.
+
+    The server is started lazily on a free localhost port, restarted when it has died, and terminated at exit.
+
+    Args:
+        timeout (int): Per-request timeout of the server in seconds. Defaults to 120.
+        startup_timeout (float): Seconds to wait for the server to accept connections. Defaults to 10.
+    """
+
+    def __init__(self, timeout: int = 120, startup_timeout: float = 10) -> None:
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.port = 0
+        self._process: subprocess.Popen | None = None
+        self._lock = threading.Lock()
+        self._unavailable = False
+        atexit.register(self.stop)
+
+    @staticmethod
+    def server_cmd() -> list[str]:
+        """Command starting the server, or an empty list if no installed pandoc has a server."""
+        if has_tool("pandoc-server"):
+            return [probe_toolchain()["pandoc-server"]["path"]]
+        if has_tool("pandoc") and has_pandoc_feature("server"):
+            return ["pandoc", "server"]
+        return []
+
+    def ensure(self) -> bool:
+        """Start or restart the server when needed.
+
+        Returns:
+            bool: Whether the server is running.
+        """
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                return True
+            if self._unavailable or not (cmd := self.server_cmd()):
+                return False
+
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.bind(("127.0.0.1", 0))
+                self.port = s.getsockname()[1]
+
+            cmd = [*cmd, "--port", str(self.port), "--timeout", str(self.timeout)]
+            self._process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+            deadline = time.monotonic() + self.startup_timeout
+            while time.monotonic() < deadline:
+                if self._process.poll() is not None:
+                    break
+                try:
+                    with socket.create_connection(("127.0.0.1", self.port), timeout=0.2):
+                        return True
+                except OSError:
+                    time.sleep(0.02)
+
+            # Do not retry a server which cannot be started: the cli backend is used instead
+            print(f"Pandoc server could not be started with `{' '.join(cmd)}`, using the pandoc cli instead.")
+            self._unavailable = True
+            self._stop()
+            return False
+
+    def convert(self, request: dict) -> dict:
+        """Send one conversion request.
+
+        Args:
+            request (dict): JSON request of the pandoc server.
+
+        Returns:
+            dict: JSON response of the pandoc server.
+
+        Raises:
+            RuntimeError: If the server returns an error.
+        """
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=self.timeout + 10)
+        try:
+            body = json.dumps(request).encode("utf-8")
+            headers = {"Content-Type": "application/json", "Accept": "application/json"}
+            connection.request("POST", "/", body, headers)
+            response = connection.getresponse()
+            data = response.read().decode("utf-8")
+        finally:
+            connection.close()
+
+        if response.status != 200:
+            raise RuntimeError(data)
+        return json.loads(data)
+
+    def stop(self) -> None:
+        """Terminate the server."""
+        with self._lock:
+            self._stop()
+        return None
+
+    def _stop(self) -> None:
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        self._process = None
+        return None
+
+
+class PandocServerBackend(PandocCliBackend):
+    """Send conversions to a long-running local pandoc server.
+
+    The pandoc command built for the cli is translated into a JSON request, so outputs stay identical.
+    Conversions the server cannot do (such as pdf) and server failures fall back to the cli.
+
+    Args:
+        server (PandocServer): Supervised pandoc server.
+    """
+
+    name = "server"
+
+    # Output formats inferred by pandoc from the extension of `-o`
+    _extension_to_format: ClassVar[dict[str, str]] = {".md": "markdown", ".tex": "latex", ".html": "html"}
+
+    def __init__(self, server: PandocServer) -> None:
+        self.server = server
+
+    def run(self, cmd: list[str], error_flag: str) -> None:
+        if (request := self._to_request(cmd)) is None or not self.server.ensure():
+            return super().run(cmd, error_flag)
+
+        full_output, request = request
+        if (response := self._convert(request, error_flag)) is None:
+            return None
+
+        output = response.get("output", "")
+        if response.get("base64", False):
+            with open(full_output, "wb") as f:
+                f.write(base64.b64decode(output))
+        else:
+            with open(full_output, "w", encoding="utf-8", newline="\n") as f:
+                f.write(self._add_new_line(output))
+        return None
+
+    def run_piped(self, cmd: list[str], text: str, error_flag: str) -> str:
+        if (request := self._to_request(cmd, text)) is None or not self.server.ensure():
+            return super().run_piped(cmd, text, error_flag)
+
+        if (response := self._convert(request[1], error_flag)) is None or response.get("base64", False):
+            return ""
+        return self._add_new_line(response.get("output", ""))
+
+    def _convert(self, request: dict, error_flag: str) -> dict | None:
+        try:
+            return self.server.convert(request)
+        except (OSError, RuntimeError, http.client.HTTPException) as e:
+            print(f"Pandoc error in {error_flag}:", e)
+            return None
+
+    @staticmethod
+    def _add_new_line(output: str) -> str:
+        # the cli ends non-standalone text outputs with a newline
+        return output if output.endswith("\n") else output + "\n"
+
+    async def run_async(self, cmd: list[str], error_flag: str) -> None:
+        async with _pandoc_semaphore():
+            await asyncio.to_thread(self.run, cmd, error_flag)
+        return None
+
+    def _to_request(self, cmd: list[str], text: str | None = None) -> tuple[str, dict] | None:
+        """Translate a pandoc command into (output file, JSON request), or None if it is not supported.
+
+        The input is read from the input file of the command, or is `text` for a piped command. `-M key=value`
+        becomes a YAML block appended to markdown input: a later metadata block wins over the document ones,
+        as `-M` does, and the value is escaped, so it stays the literal string pandoc reads from the cli. In
+        JSON input, it replaces the metadata field.
+        """
+        full_input, full_output, metadata = "", "", {}
+        request: dict = {"from": "markdown"}
+        files: dict[str, str] = {}
+
+        args = iter(cmd[1:])
+        for arg in args:
+            if arg == "-o":
+                full_output = next(args, "")
+            elif arg == "-t":
+                request["to"] = next(args, "")
+            elif arg in ("-f", "--from"):
+                request["from"] = next(args, "")
+            elif arg == "--columns":
+                request["columns"] = int(next(args, "72"))
+            elif arg == "--citeproc":
+                request["citeproc"] = True
+            elif arg == "-M":
+                key, _, value = next(args, "").partition("=")
+                if not key or key in metadata:
+                    return None  # repeated keys become lists on the cli
+                metadata[key] = value
+            elif arg.startswith("--bibliography="):
+                request.setdefault("bibliography", []).append(self._add_file(files, arg.split("=", 1)[1]))
+            elif arg.startswith("--csl="):
+                request["csl"] = self._add_file(files, arg.split("=", 1)[1])
+            elif arg.startswith("-") or full_input:
+                return None  # such as `--pdf-engine` or `--template`
+            else:
+                full_input = arg
+
+        if "to" not in request:
+            if not full_output:
+                request["to"] = "html"  # pandoc writes html to stdout by default
+            elif (to := self._extension_to_format.get(os.path.splitext(full_output)[1])) is not None:
+                request["to"] = to
+            else:
+                return None
+
+        if text is None:
+            if not (full_input and full_output and os.path.isfile(full_input)):
+                return None
+            with open(full_input, encoding="utf-8") as f:
+                text = f.read()
+        elif full_input or full_output:
+            return None
+
+        if metadata and request["from"] == "json":
+            doc = json.loads(text)
+            doc["meta"].update({k: self._json_metadata(v) for k, v in metadata.items()})
+            text = json.dumps(doc)
+        elif metadata:
+            if not request["from"].startswith("markdown"):
+                return None
+            text = text + "\n\n---\n" + "".join(self._yaml_metadata(k, v) for k, v in metadata.items()) + "...\n"
+        request["text"] = text
+
+        if files:
+            request["files"] = {}
+            for name, full_file in files.items():
+                with open(full_file, "rb") as f:
+                    request["files"][name] = base64.b64encode(f.read()).decode("ascii")
+        return full_output, request
+
+    @staticmethod
+    def _add_file(files: dict[str, str], full_file: str) -> str:
+        # files with the same base name in different directories must not overwrite each other
+        sha = hashlib.sha256(os.path.abspath(full_file).encode("utf-8")).hexdigest()[:12]
+        name = f"{sha}-{os.path.basename(full_file)}"
+        files[name] = full_file
+        return name
+
+    @staticmethod
+    def _json_metadata(value: str) -> dict:
+        if value in ("", "true", "false"):
+            return {"t": "MetaBool", "c": value != "false"}
+        return {"t": "MetaString", "c": value}
+
+    @staticmethod
+    def _yaml_metadata(key: str, value: str) -> str:
+        # the cli reads "true", "false" and "" as booleans and everything else as a plain string
+        if value in ("", "true", "false"):
+            return f"{json.dumps(key)}: {value or 'true'}\n"
+        escaped = _REGEX_MARKDOWN_PUNCTUATION.sub(r"\\\1", value)
+        return f"{json.dumps(key)}: {json.dumps(escaped)}\n"
+
+
+_PANDOC_SERVER: PandocServer | None = None
+
+
+def get_pandoc_backend(name: str = "cli") -> PandocCliBackend:
+    """Obtain the backend running pandoc conversions.
+
+    Args:
+        name (str): "cli" for one-shot pandoc processes or "server" for a long-running pandoc server.
+            Defaults to "cli".
+
+    Returns:
+        PandocCliBackend: Pandoc backend. The server is shared by the whole process.
+    """
+    global _PANDOC_SERVER
+    if name == "server":
+        if _PANDOC_SERVER is None:
+            _PANDOC_SERVER = PandocServer()
+        return PandocServerBackend(_PANDOC_SERVER)
+    return PandocCliBackend()
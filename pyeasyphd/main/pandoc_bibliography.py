@@ -0,0 +1,168 @@
+import hashlib
+import os
+import re
+import tempfile
+from collections.abc import Callable
+
+from .toolchain import has_pandoc_feature
+
+# Entries of parsed bibliographies, keyed by the hash of their content
+_BIB_INDEXES: dict[str, tuple[list[str], dict[str, str]]] = {}
+
+# Most recently used CSL-JSON files kept in a store
+_STORE_MAX_FILES = 256
+
+_REGEX_BLOCK = re.compile(r"@[ \t]*(\w+)[ \t]*([{(])[ \t]*([^,\s]*)")
+_REGEX_DELIMITER = re.compile(r'[{}()"]')
+_REGEX_PARENT = re.compile(r"\b(?:crossref|xdata)\s*=\s*[{\"]?\s*([^,}\"\s]+)", re.IGNORECASE)
+# Pandoc citation keys: `@key` or `@{key}`, trailing punctuation is not part of the key
+_REGEX_CITE = re.compile(r"@\{([^{}]+)\}|@([\w][\w:.#$%&\-+?<>~/]*)")
+
+
+def cited_keys(text: str) -> set[str] | None:
+    """Citation keys used in markdown content.
+
+    Args:
+        text (str): Markdown content.
+
+    Returns:
+        set[str] | None: Candidate keys (a superset of the cited keys), or None if every entry is cited by `@*`.
+    """
+    if "@*" in text:
+        return None
+
+    keys = set()
+    for braced, plain in _REGEX_CITE.findall(text):
+        keys.add(braced or plain)
+        if plain:
+            keys.add(plain.rstrip(":.#$%&-+?<>~/"))
+    return keys
+
+
+def _block_end(text: str, start: int, opener: str) -> int:
+    # end of the block whose `{` or `(` is at `start`, braces inside the block are balanced and `"` delimits
+    # field values at the top level of the block, in which `(` blocks do not end
+    depth, quoted = 0, False
+    level = 1 if opener == "{" else 0
+    for mch in _REGEX_DELIMITER.finditer(text, start):
+        if (c := mch.group()) == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+        elif c == '"' and depth == level:
+            quoted = not quoted
+        elif c == ")" and opener == "(" and depth == 0 and not quoted:
+            return mch.end()
+        if opener == "{" and depth == 0:
+            return mch.end()
+    return len(text)
+
+
+def index_bibliography(full_bib: str) -> tuple[str, list[str], dict[str, str]]:
+    """Split a bibliography into blocks.
+
+    As in BibTeX, a block starts at any `@type{` or `@type(` outside other blocks and ends at its balanced
+    closing delimiter, so `@comment{...}` hides the entries inside it, as it does for pandoc.
+
+    Args:
+        full_bib (str): Full path of the bib file.
+
+    Returns:
+        tuple[str, list[str], dict[str, str]]: Content hash, blocks needed by every entry (such as `@string`
+            and `@preamble`) and the text of every entry by its key.
+    """
+    with open(full_bib, "rb") as f:
+        content = f.read()
+    sha = hashlib.sha256(content).hexdigest()
+
+    if (index := _BIB_INDEXES.get(sha)) is None:
+        text = content.decode("utf-8", errors="replace")
+        common, entries, pos = [], {}, 0
+        while mch := _REGEX_BLOCK.search(text, pos):
+            pos = _block_end(text, mch.start(2), mch.group(2))
+            block = text[mch.start() : pos] + "\n"
+            block_type = mch.group(1).lower()
+            if block_type in ("string", "preamble"):
+                common.append(block)
+            elif block_type != "comment":
+                entries.setdefault(mch.group(3), block)
+        index = _BIB_INDEXES[sha] = (common, entries)
+    return sha, *index
+
+
+def cited_bibliography(
+    full_bib: str, text: str, path_store: str, run_piped: Callable[[list[str], str, str], str]
+) -> str:
+    """Bibliography restricted to the entries cited in markdown content, in CSL-JSON.
+
+    The cited entries (with their `crossref`/`xdata` parents and all `@string` blocks) are converted once by
+    pandoc itself, so citeproc sees the same data as with the whole bib file. The CSL-JSON file is stored by
+    the hash of the cited entries and reused by later conversions; the least recently used files beyond
+    `_STORE_MAX_FILES` are removed.
+
+    Args:
+        full_bib (str): Full path of the bib file.
+        text (str): Markdown content.
+        path_store (str): Directory of the CSL-JSON files.
+        run_piped (Callable[[list[str], str, str], str]): Runs a piped pandoc command, see `PandocCliBackend`.
+
+    Returns:
+        str: Full path of the bibliography to pass to pandoc, `full_bib` itself if it cannot be restricted.
+    """
+    if not os.path.isfile(full_bib) or (keys := cited_keys(text)) is None:
+        return full_bib
+
+    _, common, entries = index_bibliography(full_bib)
+
+    # add parents of cited entries
+    keys = {k for k in keys if k in entries}
+    todo = list(keys)
+    while todo:
+        for parent in _REGEX_PARENT.findall(entries[todo.pop()]):
+            if parent in entries and parent not in keys:
+                keys.add(parent)
+                todo.append(parent)
+
+    # keep the order of the bib file, which breaks ties of citeproc sorting
+    subset = "".join(common) + "".join(block for k, block in entries.items() if k in keys)
+    sha = hashlib.sha256(subset.encode("utf-8")).hexdigest()
+    full_json = os.path.join(path_store, f"{sha}.json")
+    full_subset_bib = os.path.join(path_store, f"{sha}.bib")
+    for full_file in (full_json, full_subset_bib):
+        if os.path.isfile(full_file):
+            os.utime(full_file)  # mark as recently used
+            return full_file
+
+    os.makedirs(path_store, exist_ok=True)
+    csl_json = ""
+    if has_pandoc_feature("csljson"):
+        csl_json = run_piped(["pandoc", "--from", "biblatex", "-t", "csljson"], subset, "pandoc bib to csljson")
+    if not csl_json.lstrip().startswith("["):
+        # keep the restricted bib when the conversion fails
+        with open(full_subset_bib, "w", encoding="utf-8", newline="\n") as f:
+            f.write(subset)
+        _prune_store(path_store)
+        return full_subset_bib
+
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="\n", dir=path_store, delete=False) as f:
+        f.write(csl_json)
+    os.replace(f.name, full_json)
+    _prune_store(path_store)
+    return full_json
+
+
+def _prune_store(path_store: str) -> None:
+    full_files = []
+    for name in os.listdir(path_store):
+        if name.endswith((".json", ".bib")):
+            try:
+                full_files.append((os.path.getmtime(full_file := os.path.join(path_store, name)), full_file))
+            except OSError:
+                continue
+
+    for _, full_file in sorted(full_files)[: max(len(full_files) - _STORE_MAX_FILES, 0)]:
+        try:
+            os.remove(full_file)
+        except OSError:
+            continue
+    return None
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import shutil
+import threading
+
+# Caches shared by all PandocMdTo instances of the process, keyed by their directory
+_PANDOC_CACHES: dict[str, "PandocCache"] = {}
+
+# Outputs embedding the images referenced by the markdown, which are not part of the key
+_EMBEDDING_EXTENSIONS = (".pdf", ".docx", ".odt", ".epub", ".pptx")
+_EMBEDDING_FLAGS = ("--embed-resources", "--self-contained")
+
+
+class PandocCache:
+    """Content-addressed on-disk store of pandoc outputs.
+
+    A conversion is keyed by the pandoc arguments in which every file argument (input markdown,
+    bibliography, csl, template) is replaced by the hash of its content and the output file by its
+    extension. Entries are evicted least recently used first when the store exceeds its size cap.
+
+    Outputs embedding the images referenced by the markdown (pdf, docx, ... or `--embed-resources`) are not
+    cached, since those images are not part of the key.
+
+    The entries live in the `entries` subdirectory, so other stores in the same directory are left alone.
+
+    Args:
+        path_cache (str): Directory of the store.
+        max_size (int): Size cap of the store in bytes.
+
+    Attributes:
+        hits (int): Number of conversions answered from the store.
+        misses (int): Number of conversions which ran pandoc.
+    """
+
+    def __init__(self, path_cache: str, max_size: int) -> None:
+        self.path_cache = path_cache
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size: int | None = None
+
+    def key(self, cmd: list[str], text: str | None = None) -> str:
+        """Hash of a pandoc command.
+
+        Args:
+            cmd (list[str]): Pandoc command, as built by PandocMdTo.
+            text (str | None): Input text of a piped command. Defaults to None.
+
+        Returns:
+            str: Hex digest, or "" if the command has no input file or no output file, or embeds images.
+        """
+        sha = hashlib.sha256()
+        has_input, has_output = text is not None, text is not None
+        if text is not None:
+            sha.update(b"-\0" + text.encode("utf-8") + b"\0")
+
+        args = iter(cmd)
+        for arg in args:
+            if arg == "-o":
+                if (extension := os.path.splitext(next(args, ""))[1]).lower() in _EMBEDDING_EXTENSIONS:
+                    return ""
+                sha.update(b"-o\0" + extension.encode("utf-8") + b"\0")
+                has_output = True
+                continue
+            if arg.startswith(_EMBEDDING_FLAGS):
+                return ""
+
+            flag, sep, value = arg.partition("=") if arg.startswith("--") else ("", "", arg)
+            if os.path.isfile(value):
+                sha.update(f"{flag}{sep}".encode() + self._file_digest(value) + b"\0")
+                has_input = has_input or not flag
+            else:
+                sha.update(arg.encode("utf-8") + b"\0")
+        return sha.hexdigest() if (has_input and has_output) else ""
+
+    def get(self, key: str, full_output: str) -> bool:
+        """Materialize a stored output.
+
+        Args:
+            key (str): Key from `key`.
+            full_output (str): Full path of the output file.
+
+        Returns:
+            bool: Whether the output was stored.
+        """
+        full_entry = self._full_entry(key)
+        try:
+            shutil.copyfile(full_entry, full_output)
+            os.utime(full_entry)  # mark as recently used
+        except OSError:
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        return True
+
+    def get_text(self, key: str) -> str | None:
+        """Stored output of a piped command.
+
+        Args:
+            key (str): Key from `key`.
+
+        Returns:
+            str | None: Output text, or None if it was not stored.
+        """
+        full_entry = self._full_entry(key)
+        try:
+            with open(full_entry, encoding="utf-8", newline="\n") as f:
+                text = f.read()
+            os.utime(full_entry)  # mark as recently used
+        except OSError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return text
+
+    def put(self, key: str, full_output: str) -> None:
+        """Store an output and evict the least recently used entries beyond the size cap.
+
+        Args:
+            key (str): Key from `key`.
+            full_output (str): Full path of the output file written by pandoc.
+        """
+        with open(full_output, "rb") as f:
+            self._put(key, f.read())
+        return None
+
+    def put_text(self, key: str, text: str) -> None:
+        """Store the output of a piped command, see `put`.
+
+        Args:
+            key (str): Key from `key`.
+            text (str): Output text.
+        """
+        self._put(key, text.encode("utf-8"))
+        return None
+
+    def _put(self, key: str, content: bytes) -> None:
+        full_entry = self._full_entry(key)
+        os.makedirs(os.path.dirname(full_entry), exist_ok=True)
+
+        with self._lock:
+            old_size = os.path.getsize(full_entry) if os.path.isfile(full_entry) else 0
+            with open(full_entry, "wb") as f:
+                f.write(content)
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += os.path.getsize(full_entry) - old_size
+
+            if self._size > self.max_size:
+                for full_file, size, _ in sorted(self._entries(), key=lambda x: x[2]):
+                    if self._size <= self.max_size:
+                        break
+                    os.remove(full_file)
+                    self._size -= size
+        return None
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            shutil.rmtree(self._path_entries(), ignore_errors=True)
+            self._size = None
+            self.hits, self.misses = 0, 0
+        return None
+
+    def _path_entries(self) -> str:
+        return os.path.join(self.path_cache, "entries")
+
+    def _full_entry(self, key: str) -> str:
+        return os.path.join(self._path_entries(), key[:2], key)
+
+    def _entries(self) -> list[tuple[str, int, float]]:
+        entries = []
+        for root, _, files in os.walk(self._path_entries()):
+            for name in files:
+                try:
+                    stat = os.stat(full_file := os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((full_file, stat.st_size, stat.st_mtime))
+        return entries
+
+    @staticmethod
+    def _file_digest(full_file: str) -> bytes:
+        with open(full_file, "rb") as f:
+            return hashlib.file_digest(f, "sha256").digest()
+
+
+def get_pandoc_cache(path_cache: str, max_size_mb: float = 512) -> PandocCache | None:
+    """Obtain the pandoc cache of a directory.
+
+    Args:
+        path_cache (str): Directory of the store. "" disables the cache.
+        max_size_mb (float): Size cap of the store in megabytes. Defaults to 512.
+
+    Returns:
+        PandocCache | None: Cache shared by the whole process, or None if disabled.
+    """
+    if not path_cache:
+        return None
+
+    path_cache = os.path.abspath(os.path.expanduser(path_cache))
+    if (cache := _PANDOC_CACHES.get(path_cache)) is None:
+        cache = _PANDOC_CACHES[path_cache] = PandocCache(path_cache, int(max_size_mb * 1024 * 1024))
+    cache.max_size = int(max_size_mb * 1024 * 1024)
+    return cache
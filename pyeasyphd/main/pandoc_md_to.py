@@ -1,11 +1,15 @@
-import copy
+import asyncio
+import io
+import json
 import os
 import re
-import subprocess
+import shutil
 import time
+from collections.abc import Awaitable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
 
 from pyadvtools import (
-    combine_content_in_list,
     delete_empty_lines_last_occur_add_new_line,
     insert_list_in_list,
     read_list,
@@ -15,6 +19,44 @@ from pyadvtools import (
 
 from ..utils.utils import operate_on_generate_html
 from .basic_input import BasicInput
+from .latex_builds import latex_build_path, run_latexmk, run_latexmk_async
+from .pandoc_backends import get_pandoc_backend, set_pandoc_max_concurrency
+from .pandoc_bibliography import cited_bibliography
+from .pandoc_cache import get_pandoc_cache
+from .toolchain import default_cache_path, has_tool
+
+T = TypeVar("T")
+
+# Citeproc references: start of an opening tag, opening tag with the citation key, closing tag
+_PANDOC_REF_START = re.compile(r":::\s{#")
+_PANDOC_REF_OPEN = re.compile(r"^:::\s{#ref-(.*)\s\.csl-entry}")
+_PANDOC_REF_CLOSE = re.compile(r"^:::")
+_MMD_REF_START = re.compile(r'<div\sid="ref')
+_MMD_REF_OPEN = re.compile(r'^<div\sid="ref-(.*?)"')
+_MMD_REF_CLOSE = re.compile(r"^</div>")
+_REGEX_URL = re.compile(r"([<\[]https?://)")
+
+
+def indent_reference(fragment: tuple[str, ...], prefix: str, indent: str) -> Iterator[str]:
+    """Lines of a reference fragment as a list item, without copying the fragment.
+
+    Args:
+        fragment (tuple[str, ...]): Lines of the reference.
+        prefix (str): Added before the first line, such as "- ".
+        indent (str): Added before every line which starts a new line, such as "  ".
+
+    Yields:
+        str: Indented lines.
+    """
+    previous = ""
+    for j, line in enumerate(fragment):
+        if j == 0:
+            yield prefix + line
+        elif previous[-1:] == "\n":
+            yield indent + line
+        else:
+            yield line
+        previous = line
 
 
 class PandocMdTo(BasicInput):
@@ -34,6 +76,23 @@ class PandocMdTo(BasicInput):
         add_anchor_for_beauty_dict (bool): Whether to add anchor for items in beauty dict. Defaults to False.
         add_anchor_for_complex_dict (bool): Whether to add anchor for items in complex dict. Defaults to False.
         details_to_bib_separator (str): Separator between <details> and bibliography content. Defaults to "\n".
+        pandoc_max_concurrency (int | None): Shared limit of concurrently running pandoc processes of the async
+            methods. Defaults to None (the CPU count, or the limit set before).
+        pandoc_backend (str): "cli" runs one pandoc process per conversion, "server" sends md, tex and html
+            conversions to a long-running local `pandoc server`. Defaults to "cli".
+        pandoc_cache_path (str): Directory of the content-addressed store of pandoc outputs. Identical conversions
+            (same input, bibliography, csl, template and arguments) are then copied from the store instead of
+            running pandoc. Defaults to "" (disabled).
+        pandoc_cache_max_size (float): Size cap of the store in megabytes, least recently used entries are evicted
+            first. Defaults to 512.
+        pandoc_cited_bibliography (bool): Whether citeproc reads a CSL-JSON bibliography restricted to the entries
+            cited in the document instead of parsing the whole bib file. The files are kept in `bibliography` of
+            `pandoc_cache_path`, or of `default_cache_path()`. Defaults to False.
+        pandoc_pdf_latexmk (bool): Whether pdfs are built by pandoc writing LaTeX and latexmk compiling it in a
+            persistent build directory per document, so aux and toc files are reused and re-renders usually need
+            a single pass. Defaults to False (pandoc compiles in a throwaway directory).
+        pandoc_pdf_build_path (str): Directory of the build directories. Defaults to "" (`latex` in
+            `default_cache_path()`).
     """
 
     def __init__(self, options: dict) -> None:
@@ -61,6 +120,17 @@ class PandocMdTo(BasicInput):
 
         self.details_to_bib_separator: str = options.get("details_to_bib_separator", "\n")
 
+        # async
+        if (pandoc_max_concurrency := options.get("pandoc_max_concurrency")) is not None:
+            set_pandoc_max_concurrency(pandoc_max_concurrency)
+        self.pandoc_backend = get_pandoc_backend(options.get("pandoc_backend", "cli"))
+        self.pandoc_cache = get_pandoc_cache(
+            options.get("pandoc_cache_path", ""), options.get("pandoc_cache_max_size", 512)
+        )
+        self.pandoc_cited_bibliography: bool = options.get("pandoc_cited_bibliography", False)
+        self.pandoc_pdf_latexmk: bool = options.get("pandoc_pdf_latexmk", False)
+        self.pandoc_pdf_build_path: str = options.get("pandoc_pdf_build_path", "")
+
     def pandoc_md_to_md(
         self, path_bib: str, path_md_one: str, path_md_two: str, name_md_one: str | None, name_md_two: str | None
     ) -> list[str]:
@@ -80,6 +150,15 @@ class PandocMdTo(BasicInput):
         full_two = path_md_two if name_md_two is None else os.path.join(path_md_two, name_md_two)
         return self._pandoc_md_to_md(full_one, full_two, path_bib)
 
+    async def pandoc_md_to_md_async(
+        self, path_bib: str, path_md_one: str, path_md_two: str, name_md_one: str | None, name_md_two: str | None
+    ) -> list[str]:
+        """Awaitable counterpart of `pandoc_md_to_md`."""
+        full_one = path_md_one if name_md_one is None else os.path.join(path_md_one, name_md_one)
+        full_two = path_md_two if name_md_two is None else os.path.join(path_md_two, name_md_two)
+        await self._run_pandoc_async(self._cmd_md_to_md(full_one, full_two, path_bib), "pandoc md to md")
+        return self._result_md_to_md(full_two)
+
     def _pandoc_md_to_md(self, full_md_one: str, full_md_two: str, path_bib: str) -> list[str]:
         """Internal method to convert markdown to markdown using pandoc.
 
@@ -91,41 +170,156 @@ class PandocMdTo(BasicInput):
         Returns:
             list[str]: list of processed markdown content lines.
         """
+        self._run_pandoc(self._cmd_md_to_md(full_md_one, full_md_two, path_bib), "pandoc md to md")
+        return self._result_md_to_md(full_md_two)
+
+    def pandoc_md_to_md_piped(self, path_bib: str, data_list_md: list[str]) -> list[str]:
+        """Convert markdown content to markdown by piping it through pandoc, without temporary files.
+
+        Args:
+            path_bib (str): Path to bibliography file.
+            data_list_md (list[str]): list of source markdown content lines.
+
+        Returns:
+            list[str]: list of processed markdown content lines.
+        """
+        text_md = "".join(data_list_md)
+        cmd = ["pandoc", *self._args_md_to_md(path_bib, text_md)]
+        if not (text := self._run_pandoc_piped(cmd, text_md, "pandoc md to md")):
+            print("- pandoc false from md to md\n")
+            return []
+
+        return self._standardize_markdown_lines(self._split_lines(text))
+
+    def pandoc_md_to_md_sections(self, path_bib: str, sections: list[list[str]]) -> list[str]:
+        """Convert markdown content given in sections as one conversion, reusing the parsed sections.
+
+        Every section is parsed to the pandoc AST on its own, so with `pandoc_cache_path` only changed sections
+        are parsed again. Citeproc then runs once over the joined AST, so citation numbers, year suffixes, the
+        references and the footnotes are those of the whole document.
+
+        Args:
+            path_bib (str): Path to bibliography file.
+            sections (list[list[str]]): Markdown content lines of every section.
+
+        Returns:
+            list[str]: list of processed markdown content lines, empty if a conversion failed.
+        """
+        doc: dict = {"meta": {}, "blocks": []}
+        nocite, notes = [], 0
+        for section in sections:
+            if not any(line.strip() for line in section):
+                continue
+            cmd = ["pandoc", "-f", "markdown", "-t", "json"]
+            if not (text := self._run_pandoc_piped(cmd, "".join(section), "pandoc md to json")):
+                print("- pandoc false from md to json\n")
+                return []
+
+            part = json.loads(text)
+            # notes are numbered from 1 in every section, and note styles of citeproc use these numbers
+            for element in self._walk_json(part["blocks"]):
+                if "citationNoteNum" in element:
+                    element["citationNoteNum"] += notes
+            notes += sum(1 for element in self._walk_json(part["blocks"]) if element.get("t") == "Note")
+
+            # later metadata blocks win, as in one document, but the `nocite` keys of all sections are kept
+            if (value := part["meta"].pop("nocite", None)) is not None:
+                nocite.append(value)
+            doc["meta"].update(part["meta"])
+            doc["pandoc-api-version"] = part["pandoc-api-version"]
+            doc["blocks"].extend(part["blocks"])
+
+        if not doc["blocks"]:
+            return []
+        if nocite:
+            doc["meta"]["nocite"] = {"t": "MetaList", "c": nocite}
+        self._unique_identifiers(doc["blocks"])
+
+        cmd = ["pandoc", "-f", "json", *self._args_md_to_md(path_bib, "".join(line for x in sections for line in x))]
+        if not (text := self._run_pandoc_piped(cmd, json.dumps(doc), "pandoc md to md")):
+            print("- pandoc false from md to md\n")
+            return []
+
+        return self._standardize_markdown_lines(self._split_lines(text))
+
+    @classmethod
+    def _walk_json(cls, value) -> Iterator[dict]:
+        """Objects of a pandoc JSON AST in document order."""
+        if isinstance(value, dict):
+            yield value
+            value = list(value.values())
+        if isinstance(value, list):
+            for v in value:
+                yield from cls._walk_json(v)
+
+    @classmethod
+    def _unique_identifiers(cls, blocks: list) -> None:
+        """Number repeated heading identifiers of different sections as pandoc does in one document."""
+        used: set[str] = set()
+        for element in cls._walk_json(blocks):
+            if element.get("t") != "Header" or not (identifier := element["c"][1][0]):
+                continue
+            if identifier in used:
+                n = 1
+                while f"{identifier}-{n}" in used:
+                    n += 1
+                identifier = element["c"][1][0] = f"{identifier}-{n}"
+            used.add(identifier)
+        return None
+
+    def _cmd_md_to_md(self, full_md_one: str, full_md_two: str, path_bib: str) -> list[str]:
         if not os.path.exists(path_two := os.path.dirname(full_md_two)):
             os.makedirs(path_two)
 
+        text_md = ""
+        if self.pandoc_cited_bibliography and os.path.isfile(full_md_one):
+            with open(full_md_one, encoding="utf-8") as f:
+                text_md = f.read()
+        return ["pandoc", full_md_one, "-o", full_md_two, *self._args_md_to_md(path_bib, text_md)]
+
+    def _args_md_to_md(self, path_bib: str, text_md: str) -> list[str]:
+        if self.pandoc_cited_bibliography and text_md:
+            path_bib = cited_bibliography(
+                path_bib, text_md, self._path_cited_bibliography(), self.pandoc_backend.run_piped
+            )
+
         if os.path.exists(self.full_csl_style_pandoc):
-            cmd = (
-                f"pandoc {full_md_one} -t {self.markdown_citation} "
-                f"-o {full_md_two} -M reference-section-title='References' "
+            args = (
+                f"-t {self.markdown_citation} -M reference-section-title='References' "
                 f"--citeproc --bibliography={path_bib} --csl={self.full_csl_style_pandoc} --columns {self.columns_in_md}"
             )
         else:
-            cmd = (
-                f"pandoc {full_md_one} -t {self.markdown_citation} "
-                f"-o {full_md_two} -M reference-section-title='References' "
+            args = (
+                f"-t {self.markdown_citation} -M reference-section-title='References' "
                 f"--citeproc --bibliography={path_bib} --columns {self.columns_in_md}"
             )
+        return args.split()
 
-        try:
-            subprocess.run(cmd.split(), check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
-            print("Pandoc error in pandoc md to md:", e.stderr)
+    def _path_cited_bibliography(self) -> str:
+        if self.pandoc_cache is not None:
+            return os.path.join(self.pandoc_cache.path_cache, "bibliography")
+        return os.path.join(default_cache_path(), "bibliography")
 
+    def _result_md_to_md(self, full_md_two: str) -> list[str]:
         if not os.path.exists(full_md_two):
             print(f"- pandoc false from md to md: {os.path.basename(full_md_two)}\n")
             return []
 
-        return self._standardize_markdown_content(full_md_two)
+        return self._standardize_markdown_lines(read_list(full_md_two, "r"))
 
     @staticmethod
-    def _standardize_markdown_content(full_md: str) -> list[str]:
+    def _standardize_markdown_lines(data_list: list[str]) -> list[str]:
         regex = re.compile(r"(\s*>*\s*[-+*]+)\s\s\s(.*)")
-        for i in range(len(data_list := read_list(full_md, "r"))):
+        for i in range(len(data_list)):
             if mch := regex.match(data_list[i]):
                 data_list[i] = data_list[i].replace(mch.group(), mch.group(1) + " " + mch.group(2))
         return data_list
 
+    @staticmethod
+    def _split_lines(text: str) -> list[str]:
+        # same lines as `read_list` of a file with this content
+        return delete_empty_lines_last_occur_add_new_line(io.StringIO(text, newline="\n").readlines())
+
     # for pandoc markdown files to tex files
     def pandoc_md_to_tex(
         self, template_name: str, path_md: str, path_tex: str, name_md: str | None, name_tex: str | None
@@ -134,21 +328,51 @@ class PandocMdTo(BasicInput):
         full_two = path_tex if name_tex is None else os.path.join(path_tex, name_tex)
         return self._pandoc_md_to_tex(full_one, full_two, template_name)
 
+    async def pandoc_md_to_tex_async(
+        self, template_name: str, path_md: str, path_tex: str, name_md: str | None, name_tex: str | None
+    ) -> list[str]:
+        """Awaitable counterpart of `pandoc_md_to_tex`."""
+        full_one = path_md if name_md is None else os.path.join(path_md, name_md)
+        full_two = path_tex if name_tex is None else os.path.join(path_tex, name_tex)
+        await self._run_pandoc_async(self._cmd_md_to_tex(full_one, full_two, template_name), "pandoc md to tex")
+        return self._result_md_to_tex(full_one, full_two)
+
+    def pandoc_md_to_tex_piped(self, template_name: str, data_list_md: list[str]) -> list[str]:
+        """Convert markdown content to tex by piping it through pandoc, without temporary files.
+
+        Args:
+            template_name (str): Name of template, "beamer" or others.
+            data_list_md (list[str]): list of markdown content lines.
+
+        Returns:
+            list[str]: list of tex content lines.
+        """
+        cmd = ["pandoc", *self._args_md_to_tex(template_name)]
+        if not (text := self._run_pandoc_piped(cmd, "".join(data_list_md), "pandoc md to tex")):
+            print("- pandoc false from md to tex\n")
+            return []
+
+        return self._substitute_in_tex_from_md(self._split_lines(text))
+
     def _pandoc_md_to_tex(self, full_md: str, full_tex: str, template_name: str) -> list[str]:
         """Pandoc."""
+        self._run_pandoc(self._cmd_md_to_tex(full_md, full_tex, template_name), "pandoc md to tex")
+        return self._result_md_to_tex(full_md, full_tex)
+
+    @classmethod
+    def _cmd_md_to_tex(cls, full_md: str, full_tex: str, template_name: str) -> list[str]:
         if not os.path.exists(path_tex := os.path.dirname(full_tex)):
             os.makedirs(path_tex)
 
-        if template_name.lower() == "beamer":
-            cmd = f"pandoc {full_md} -t beamer -o {full_tex} --from markdown "
-        else:
-            cmd = f"pandoc {full_md} -o {full_tex} --from markdown "
+        return ["pandoc", full_md, "-o", full_tex, *cls._args_md_to_tex(template_name)]
 
-        try:
-            subprocess.run(cmd.split(), check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
-            print("Pandoc error in pandoc md to tex:", e.stderr)
+    @staticmethod
+    def _args_md_to_tex(template_name: str) -> list[str]:
+        if template_name.lower() == "beamer":
+            return ["-t", "beamer", "--from", "markdown"]
+        return ["-t", "latex", "--from", "markdown"]
 
+    def _result_md_to_tex(self, full_md: str, full_tex: str) -> list[str]:
         if not os.path.exists(full_tex):
             print(f"- pandoc false from md to tex: {os.path.basename(full_md)}\n")
             return []
@@ -170,19 +394,30 @@ class PandocMdTo(BasicInput):
         full_two = path_html if name_html is None else os.path.join(path_html, name_html)
         return self._pandoc_md_to_html(full_one, full_two, operate)
 
-    @staticmethod
-    def _pandoc_md_to_html(full_md: str, full_html: str, operate: bool = False) -> str:
+    async def pandoc_md_to_html_async(
+        self, path_md: str, path_html: str, name_md: str | None, name_html: str | None, operate: bool = False
+    ) -> str:
+        """Awaitable counterpart of `pandoc_md_to_html`."""
+        full_one = path_md if name_md is None else os.path.join(path_md, name_md)
+        full_two = path_html if name_html is None else os.path.join(path_html, name_html)
+        await self._run_pandoc_async(self._cmd_md_to_html(full_one, full_two), "pandoc md to html")
+        return self._result_md_to_html(full_one, full_two, operate)
+
+    def _pandoc_md_to_html(self, full_md: str, full_html: str, operate: bool = False) -> str:
         """Pandoc."""
+        self._run_pandoc(self._cmd_md_to_html(full_md, full_html), "pandoc md to html")
+        return self._result_md_to_html(full_md, full_html, operate)
+
+    @staticmethod
+    def _cmd_md_to_html(full_md: str, full_html: str) -> list[str]:
         if not os.path.exists(path_html := os.path.dirname(full_html)):
             os.makedirs(path_html)
 
         cmd = f"pandoc {full_md} -o {full_html} --from markdown "
+        return cmd.split()
 
-        try:
-            subprocess.run(cmd.split(), check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
-            print("Pandoc error in pandoc md to html:", e.stderr)
-
+    @staticmethod
+    def _result_md_to_html(full_md: str, full_html: str, operate: bool) -> str:
         if not os.path.exists(full_html):
             return f"- pandoc false from md to html: {os.path.basename(full_md)}\n"
 
@@ -196,8 +431,61 @@ class PandocMdTo(BasicInput):
         full_two = path_pdf if name_pdf is None else os.path.join(path_pdf, name_pdf)
         return self._pandoc_md_to_pdf(full_one, full_two)
 
+    async def pandoc_md_to_pdf_async(
+        self, path_md: str, path_pdf: str, name_md: str | None, name_pdf: str | None
+    ) -> str:
+        """Awaitable counterpart of `pandoc_md_to_pdf`."""
+        full_one = path_md if name_md is None else os.path.join(path_md, name_md)
+        full_two = path_pdf if name_pdf is None else os.path.join(path_pdf, name_pdf)
+        if self._use_latexmk_for_pdf():
+            full_tex, path_build = self._latex_build_for_pdf(full_two)
+            await self._run_pandoc_async(self._cmd_md_to_latex(full_one, full_tex), "pandoc md to latex")
+            if os.path.exists(full_tex) and await run_latexmk_async(full_tex, "xelatex", path_build):
+                self._copy_built_pdf(full_tex, path_build, full_two)
+        else:
+            await self._run_pandoc_async(self._cmd_md_to_pdf(full_one, full_two), "pandoc md to pdf")
+        return self._result_md_to_pdf(full_one, full_two)
+
     def _pandoc_md_to_pdf(self, full_md: str, full_pdf: str) -> str:
         """Pandoc."""
+        if self._use_latexmk_for_pdf():
+            full_tex, path_build = self._latex_build_for_pdf(full_pdf)
+            self._run_pandoc(self._cmd_md_to_latex(full_md, full_tex), "pandoc md to latex")
+            if os.path.exists(full_tex) and run_latexmk(full_tex, "xelatex", path_build):
+                self._copy_built_pdf(full_tex, path_build, full_pdf)
+        else:
+            self._run_pandoc(self._cmd_md_to_pdf(full_md, full_pdf), "pandoc md to pdf")
+        return self._result_md_to_pdf(full_md, full_pdf)
+
+    def _use_latexmk_for_pdf(self) -> bool:
+        # fall back to pandoc, which reports the missing tools, when latexmk cannot be run
+        return self.pandoc_pdf_latexmk and has_tool("latexmk") and has_tool("xelatex")
+
+    def _latex_build_for_pdf(self, full_pdf: str) -> tuple[str, str]:
+        # only aux files go here, latexmk runs in the current directory, which is pandoc's default resource path,
+        # so relative figure paths resolve as with `_cmd_md_to_pdf`
+        path_root = self.pandoc_pdf_build_path or os.path.join(default_cache_path(), "latex")
+        path_build = latex_build_path(path_root, full_pdf)
+        os.makedirs(path_build, exist_ok=True)
+        return os.path.join(path_build, os.path.splitext(os.path.basename(full_pdf))[0] + ".tex"), path_build
+
+    def _cmd_md_to_latex(self, full_md: str, full_tex: str) -> list[str]:
+        # the standalone LaTeX pandoc would compile itself for `_cmd_md_to_pdf`
+        cmd = ["pandoc", full_md, "-o", full_tex, "--from", "markdown", "--standalone", "--listings"]
+        if os.path.exists(self.full_tex_article_template_pandoc):
+            cmd.extend(["--template", self.full_tex_article_template_pandoc])
+        return cmd
+
+    @staticmethod
+    def _copy_built_pdf(full_tex: str, path_build: str, full_pdf: str) -> None:
+        full_built = os.path.join(path_build, os.path.splitext(os.path.basename(full_tex))[0] + ".pdf")
+        if os.path.exists(full_built):
+            if path_pdf := os.path.dirname(full_pdf):
+                os.makedirs(path_pdf, exist_ok=True)
+            shutil.copyfile(full_built, full_pdf)
+        return None
+
+    def _cmd_md_to_pdf(self, full_md: str, full_pdf: str) -> list[str]:
         if not os.path.exists(path_pdf := os.path.dirname(full_pdf)):
             os.makedirs(path_pdf)
 
@@ -208,22 +496,96 @@ class PandocMdTo(BasicInput):
             )
         else:
             cmd = f"pandoc {full_md} -o {full_pdf} --from markdown  --listings --pdf-engine=xelatex"
+        return cmd.split()
 
-        try:
-            subprocess.run(cmd.split(), check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
-            print("Pandoc error in pandoc md to pdf:", e.stderr)
-
+    @staticmethod
+    def _result_md_to_pdf(full_md: str, full_pdf: str) -> str:
         if not os.path.exists(full_pdf):
             return f"- pandoc false from md to pdf: {os.path.basename(full_md)}\n"
         return ""
 
+    def _run_pandoc(self, cmd: list[str], error_flag: str) -> None:
+        if (key := self._pandoc_cache_key(cmd)) and self.pandoc_cache.get(key, cmd[cmd.index("-o") + 1]):
+            return None
+
+        before = self._output_stat(cmd) if key else None
+        self.pandoc_backend.run(cmd, error_flag)
+        if key:
+            self._pandoc_cache_put(key, cmd, before)
+        return None
+
+    async def _run_pandoc_async(self, cmd: list[str], error_flag: str) -> None:
+        if (key := self._pandoc_cache_key(cmd)) and self.pandoc_cache.get(key, cmd[cmd.index("-o") + 1]):
+            return None
+
+        before = self._output_stat(cmd) if key else None
+        await self.pandoc_backend.run_async(cmd, error_flag)
+        if key:
+            self._pandoc_cache_put(key, cmd, before)
+        return None
+
+    def _run_pandoc_piped(self, cmd: list[str], text: str, error_flag: str) -> str:
+        key = "" if self.pandoc_cache is None else self.pandoc_cache.key(cmd, text)
+        if key and (output := self.pandoc_cache.get_text(key)) is not None:
+            return output
+
+        output = self.pandoc_backend.run_piped(cmd, text, error_flag)
+        if key and output:
+            self.pandoc_cache.put_text(key, output)
+        return output
+
+    def _pandoc_cache_key(self, cmd: list[str]) -> str:
+        return "" if self.pandoc_cache is None else self.pandoc_cache.key(cmd)
+
+    def _pandoc_cache_put(self, key: str, cmd: list[str], before: tuple[int, int] | None) -> None:
+        # only store outputs pandoc has just written, not stale outputs of a failed conversion
+        if (after := self._output_stat(cmd)) is not None and after != before:
+            self.pandoc_cache.put(key, cmd[cmd.index("-o") + 1])
+        return None
+
+    @staticmethod
+    def _output_stat(cmd: list[str]) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(cmd[cmd.index("-o") + 1])
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def run_concurrently(awaitables: list[Awaitable[T]]) -> list[T]:
+        """Run awaitable conversions concurrently from synchronous code.
+
+        The number of pandoc processes running at the same time is bounded by the shared limit of
+        `set_pandoc_max_concurrency`.
+
+        Args:
+            awaitables (list[Awaitable[T]]): Awaitable conversions such as `pandoc_md_to_html_async(...)`.
+
+        Returns:
+            list[T]: Results in the order of `awaitables`.
+        """
+
+        async def _gather() -> list[T]:
+            return list(await asyncio.gather(*awaitables))
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(_gather())
+
+        # Called from a running event loop: run in a separate thread with its own loop
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, _gather()).result()
+
     # --------- --------- --------- --------- --------- --------- --------- --------- --------- #
     # md
     def generate_key_data_dict(
         self, pandoc_md_data_list: list[str], key_url_http_bib_dict: dict[str, list[list[str]]]
-    ) -> tuple[dict[str, list[str]], dict[str, list[str]], dict[str, list[str]]]:
-        """Generate."""
+    ) -> tuple[dict[str, tuple[str, ...]], dict[str, tuple[str, ...]], dict[str, tuple[str, ...]]]:
+        """Generate the basic, beauty and complex reference fragments of every citation key.
+
+        The fragments are immutable tuples sharing their lines, to be indented lazily by `indent_reference`.
+        """
         key_reference_dict = self._generate_citation_key_reference_dict_from_pandoc_md(pandoc_md_data_list)
         (key_basic_dict, key_beauty_dict, key_complex_dict) = self._generate_basic_beauty_complex_dict(
             key_url_http_bib_dict, key_reference_dict
@@ -233,77 +595,76 @@ class PandocMdTo(BasicInput):
     def _generate_citation_key_reference_dict_from_pandoc_md(
         self, pandoc_md_data_list: list[str]
     ) -> dict[str, list[str]]:
-        """Generate."""
-        pandoc_md_data_list = self.__append_pandoc_md_reference_part(pandoc_md_data_list)
+        """Generate the reference lines of every citation key in one pass over the citeproc output.
 
-        line_index, len_data = 0, len(pandoc_md_data_list)
+        An opening tag of a reference split over several lines is joined first. The reference lines then run
+        until the closing tag, or until the line with the url, which is cut before the url.
+        """
         if self.markdown_name == "pandoc-markdown":
-            a_flag, b_flag = r"^:::\s{#ref-(.*)\s\.csl-entry}", r"^:::"
+            regex_start, regex_open, regex_close, end_flag = _PANDOC_REF_START, _PANDOC_REF_OPEN, _PANDOC_REF_CLOSE, "}"
         else:  # multi-markdown
-            a_flag, b_flag = r'^<div\sid="ref-(.*?)"', r"^</div>"
-
-        regex_one, regex_two = re.compile(a_flag), re.compile(b_flag)
-        key_reference_dict = {}
-        while line_index < len_data:
-            match_one = regex_one.search(pandoc_md_data_list[line_index])
-            line_index += 1
-            if not match_one:
-                continue
-            citation_key = match_one.group(1).strip()
-
-            content = []
-            while line_index < len_data:
-                line = pandoc_md_data_list[line_index]
-                if regex_two.search(line):
-                    break
-
-                line_index += 1
-                if mch := re.search(r"([<\[]https?://)", line):
-                    content.append(line.split(mch.group(1))[0][:-1])
-                    break
-                else:
-                    if line.strip():
+            regex_start, regex_open, regex_close, end_flag = _MMD_REF_START, _MMD_REF_OPEN, _MMD_REF_CLOSE, ">"
+
+        key_reference_dict: dict[str, list[str]] = {}
+        citation_key, content = None, []
+
+        def finish() -> None:
+            key_reference_dict[citation_key] = delete_empty_lines_last_occur_add_new_line(content)
+            return None
+
+        def feed(line: str) -> None:
+            nonlocal citation_key, content
+            if citation_key is not None:
+                if not regex_close.search(line):
+                    if mch := _REGEX_URL.search(line):
+                        content.append(line.split(mch.group(1))[0][:-1])
+                        finish()
+                        citation_key = None
+                    elif line.strip():
                         content.append(line)
+                    return None
+
+                # a closing line may open the next reference as well
+                finish()
+                citation_key = None
+
+            if mch := regex_open.search(line):
+                citation_key, content = mch.group(1).strip(), []
+            return None
+
+        opening = ""  # opening tag split over several lines
+        for line in pandoc_md_data_list:
+            if opening:
+                opening = opening.rstrip() + " " + line.lstrip()
+            elif regex_start.search(line):
+                opening = line
+            else:
+                feed(line)
+                continue
 
-            key_reference_dict.update({citation_key: delete_empty_lines_last_occur_add_new_line(content)})
-        return key_reference_dict
+            if opening.rstrip()[-1:] == end_flag:
+                feed(opening)
+                opening = ""
 
-    def __append_pandoc_md_reference_part(self, pandoc_md_data_list: list[str]) -> list[str]:
-        """Append the line which starts with '::: {#'."""
-        line_index, len_data = 0, len(pandoc_md_data_list)
-        if self.markdown_name == "pandoc-markdown":
-            a_flag, b_flag = r":::\s{#", r"}"
-        else:  # multi-markdown
-            a_flag, b_flag = r'<div\sid="ref', r">"
-        regex = re.compile(a_flag)
-        new_list = []
-        while line_index < len_data:
-            line = pandoc_md_data_list[line_index]
-            line_index += 1
-            if regex.search(line):
-                while line_index < len_data:
-                    if b_flag != line.rstrip()[-1]:
-                        line = line.rstrip() + " " + pandoc_md_data_list[line_index].lstrip()
-                        line_index += 1
-                    else:
-                        new_list.append(line)
-                        break
-                if line_index == len_data:
-                    new_list.append(line)
-            else:
-                new_list.append(line)
-        return delete_empty_lines_last_occur_add_new_line(new_list)
+        if opening:
+            feed(opening)
+        if citation_key is not None:
+            finish()
+        return key_reference_dict
 
     def _generate_basic_beauty_complex_dict(
         self, key_url_http_bib_dict: dict[str, list[list[str]]], key_reference_dict: dict[str, list]
-    ) -> tuple[dict[str, list[str]], dict[str, list[str]], dict[str, list[str]]]:
-        """Generate."""
+    ) -> tuple[dict[str, tuple[str, ...]], dict[str, tuple[str, ...]], dict[str, tuple[str, ...]]]:
+        """Generate.
+
+        The reference, url and bib lines are shared between the three dicts instead of being copied.
+        """
         header_list = [f"<details>{self.details_to_bib_separator}", "```\n"]
         tail_list = ["```\n", "</details>\n"]
 
-        key_basic_dict: dict[str, list[str]] = {}
-        key_beauty_dict: dict[str, list[str]] = {}
-        key_complex_dict: dict[str, list[str]] = {}
+        key_basic_dict: dict[str, tuple[str, ...]] = {}
+        key_beauty_dict: dict[str, tuple[str, ...]] = {}
+        key_complex_dict: dict[str, tuple[str, ...]] = {}
 
         key_list_http = list(key_url_http_bib_dict.keys())
         key_list_md = list(key_reference_dict.keys())
@@ -312,31 +673,26 @@ class PandocMdTo(BasicInput):
             return key_basic_dict, key_beauty_dict, key_complex_dict
 
         for k in key_list_http:
-            a: list[str] = copy.deepcopy(key_reference_dict[k])
-            b: list[str] = copy.deepcopy(key_reference_dict[k])
-            aa: list[str] = key_url_http_bib_dict[k][0]
-            bb: list[str] = key_url_http_bib_dict[k][1]
+            reference = key_reference_dict[k]
+            aa, bb, bib = key_url_http_bib_dict[k][0], key_url_http_bib_dict[k][1], key_url_http_bib_dict[k][2]
 
             # add url
-            if self.add_url_for_basic_dict:
-                a.extend(aa)
-
-            b.extend(bb)
+            a = [*reference, *aa] if self.add_url_for_basic_dict else list(reference)
+            b = [*reference, *bb]
 
             # add anchor
             if self.add_anchor_for_basic_dict:
-                a = [f'<a id="{k.lower()}"></a>\n', *a]
+                a.insert(0, f'<a id="{k.lower()}"></a>\n')
             if self.add_anchor_for_beauty_dict or self.add_anchor_for_complex_dict:
-                b = [f'<a id="{k.lower()}"></a>\n', *b]
+                b.insert(0, f'<a id="{k.lower()}"></a>\n')
 
             if self.display_one_line_reference_note:
                 a = ["".join(a).replace("\n", " ").strip() + "\n"]
                 b = ["".join(b).replace("\n", " ").strip() + "\n"]
 
-            c = combine_content_in_list([b, header_list, key_url_http_bib_dict[k][2], tail_list])
-            key_basic_dict.update({k: a})
-            key_beauty_dict.update({k: b})
-            key_complex_dict.update({k: c})
+            key_basic_dict[k] = tuple(a)
+            key_beauty_dict[k] = tuple(b)
+            key_complex_dict[k] = (*b, *header_list, *bib, *tail_list)
         return key_basic_dict, key_beauty_dict, key_complex_dict
 
     # --------- --------- --------- --------- --------- --------- --------- --------- --------- #
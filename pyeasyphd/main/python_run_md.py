@@ -1,16 +1,28 @@
-import copy
 import os
 import re
-import shutil
+import tempfile
 import time
 from typing import Any
 
-from pyadvtools import combine_content_in_list, delete_empty_lines_last_occur_add_new_line, read_list, write_list
+from pyadvtools import (
+    combine_content_in_list,
+    delete_empty_lines_first_occur,
+    delete_empty_lines_last_occur_add_new_line,
+    read_list,
+    write_list,
+)
 from pybibtexer.bib.core import ConvertStrToLibrary
 from pybibtexer.main.python_writers import PythonWriters
 
 from .basic_input import BasicInput
-from .pandoc_md_to import PandocMdTo
+from .pandoc_md_to import PandocMdTo, indent_reference
+from .toolchain import default_cache_path
+
+# Bullet items citing one key: `- [@citation_key]` in markdown, `- [citation_key]` (maybe escaped) in pandoc output.
+# Candidate keys are looked up in dicts, so the cost does not grow with the number of keys.
+_REGEX_BULLET_CITE = re.compile(r"(\s*[-\+\*]\s*)\[@([^\[\]]+)\]")
+_REGEX_BULLET_KEY = re.compile(r"(\s*)([-\+\*])(\s*)[\\]*\[([^\[\]]+?)[\\]*\]")
+_REGEX_SECTION_HEADING = re.compile(r"#{1,2}\s")
 
 
 def batch_convert_citations(text):
@@ -55,6 +67,11 @@ class PythonRunMd(BasicInput):
         replace_by_basic_beauty_complex_in_md (str): Replace by basic, beauty, or complex format. Defaults to "beauty".
         display_basic_beauty_complex_references_in_md (str): Display basic, beauty, or complex references. Defaults to "beauty".
         add_anchor_in_md (bool): Whether add anchor in markdown. Defaults to False.
+        incremental_sections_in_md (bool): Whether every section (input file, or `#` or `##` heading of a
+            single input) is parsed by pandoc on its own and cached, so only changed sections are parsed again
+            before the one citeproc pass over the whole document. Without a `pandoc_cache_path` option, the
+            sections are cached in `pandoc` of `default_cache_path()`; an explicit "" disables the cache.
+            Defaults to False.
         details_to_bib_separator (str): Separator between <details> and bibliography content. Defaults to "\n".
     """
 
@@ -78,9 +95,13 @@ class PythonRunMd(BasicInput):
         )
         self.add_anchor_in_md: bool = options.get("add_anchor_in_md", False)
         self.details_to_bib_separator: str = options.get("details_to_bib_separator", "\n")
+        self.incremental_sections_in_md: bool = options.get("incremental_sections_in_md", False)
 
         # for md
-        self._pandoc_md_to = PandocMdTo(self.options)
+        _options = dict(self.options)
+        if self.incremental_sections_in_md and _options.get("pandoc_cache_path") is None:
+            _options["pandoc_cache_path"] = os.path.join(default_cache_path(), "pandoc")
+        self._pandoc_md_to = PandocMdTo(_options)
 
         _options = {}
         _options["is_standardize_bib"] = False
@@ -98,6 +119,7 @@ class PythonRunMd(BasicInput):
         template_name: str = "article",
         generate_html: bool = False,
         generate_tex: bool = True,
+        sections_md: list[list[str]] | None = None,
     ) -> tuple[list[str], list[str]]:
         """Perform special operations on markdown files.
 
@@ -110,22 +132,27 @@ class PythonRunMd(BasicInput):
             template_name (str): Name of template to use. Defaults to "article".
             generate_html (bool): Whether to generate HTML. Defaults to False.
             generate_tex (bool): Whether to generate LaTeX. Defaults to True.
+            sections_md (list[list[str]] | None): Markdown content lines of every input file, the sections of
+                `incremental_sections_in_md`. Defaults to None.
 
         Returns:
             tuple[list[str], list[str]]: Tuple containing processed markdown and LaTeX content.
         """
-        path_temp = os.path.join(path_output, "{}".format(time.strftime("%Y_%m_%d_%H_%M_%S")))
-        if not os.path.exists(path_temp):
-            os.makedirs(path_temp)
+        # pandoc reads md content from stdin, so intermediate files are only kept for inspection
+        path_temp = ""
+        if not self.delete_temp_generate_md:
+            # unique even for runs within the same second
+            os.makedirs(path_output, exist_ok=True)
+            path_temp = tempfile.mkdtemp(prefix="{}_".format(time.strftime("%Y_%m_%d_%H_%M_%S")), dir=path_output)
+            write_list(data_list_md, output_md_name, "w", path_temp, False)
 
-        # write original md content to temp file
-        full_temp_md = os.path.join(path_temp, output_md_name)
-        write_list(data_list_md, full_temp_md, "w", None, False)
+        # same content as writing and reading back a file
+        original_md = PandocMdTo._split_lines("".join(delete_empty_lines_first_occur(data_list_md)))
 
         # pandoc md to md to update md content
         if read_list(full_bib_for_abbr, "r") and read_list(full_bib_for_zotero, "r"):
             data_list_md = self._special_operate_for_md(
-                output_md_name, path_temp, full_bib_for_abbr, full_bib_for_zotero
+                original_md, path_temp, full_bib_for_abbr, full_bib_for_zotero, sections_md
             )
         elif os.path.exists(full_bib_for_abbr) and os.path.exists(full_bib_for_zotero):
             print(f"The content of bib: {full_bib_for_abbr} or {full_bib_for_zotero} is empty.")
@@ -154,32 +181,30 @@ class PythonRunMd(BasicInput):
         # pandoc md to latex
         data_list_tex = []
         if generate_tex:
-            n5 = "5_pandoc" + ".tex"
-            data_list_tex = self._pandoc_md_to.pandoc_md_to_tex(template_name, path_temp, path_temp, output_md_name, n5)
-
-        # delete temp path
-        if self.delete_temp_generate_md:
-            shutil.rmtree(path_temp)
+            data_list_tex = self._pandoc_md_to.pandoc_md_to_tex_piped(template_name, original_md)
+            self._write_temp(data_list_tex, "4_pandoc" + ".tex", path_temp)
         return data_list_md, data_list_tex
 
     def _special_operate_for_md(
-        self, output_md_name: str, path_temp: str, full_bib_for_abbr: str, full_bib_for_zotero: str
+        self,
+        original_md: list[str],
+        path_temp: str,
+        full_bib_for_abbr: str,
+        full_bib_for_zotero: str,
+        sections_md: list[list[str]] | None = None,
     ) -> list[str]:
         """Perform special operations for markdown processing.
 
         Args:
-            output_md_name (str): Name of output markdown file.
-            path_temp (str): Path to temporary directory.
+            original_md (list[str]): list of original markdown content lines.
+            path_temp (str): Path to directory keeping intermediate files, "" for none.
             full_bib_for_abbr (str): Path to abbreviated bibliography file.
             full_bib_for_zotero (str): Path to Zotero bibliography file.
+            sections_md (list[list[str]] | None): Markdown content lines of every input file. Defaults to None.
 
         Returns:
             list[str]: list of processed markdown content lines.
         """
-        # pandoc markdown to markdown
-        n1 = "1_pandoc" + ".md"
-        data_list_md = self._pandoc_md_to.pandoc_md_to_md(full_bib_for_abbr, path_temp, path_temp, output_md_name, n1)
-
         # use zotero bib to generate library
         bib_for_zotero = read_list(full_bib_for_zotero, "r")
         library = self._generate_library.generate_library(bib_for_zotero)
@@ -191,51 +216,70 @@ class PythonRunMd(BasicInput):
         key_url_http_bib_dict = _python_writers.output_key_url_http_bib_dict(library)
 
         content_md = []
-        if data_list_md and key_url_http_bib_dict:
-            key_basic_dict, key_beauty_dict, key_complex_dict = self._pandoc_md_to.generate_key_data_dict(
-                data_list_md, key_url_http_bib_dict
-            )
-
+        if key_url_http_bib_dict:
             key_in_md = list(key_url_http_bib_dict.keys())
 
-            # generate by replacing `- [@citation_key]` to `- [citation_key]`
-            content = read_list(output_md_name, "r", path_temp)
-            if self.replace_cite_to_fullcite_in_md:
-                regex = re.compile(r"(\s*[-\+\*]\s*)\[@({})\]".format("|".join(key_in_md)))
-                for i in range(len(content)):
-                    if not (mch := regex.match(content[i])):
-                        continue
-
-                    content[i] = content[i].replace(mch.group(), mch.group(1) + "[" + mch.group(2) + "]")
-            # add anchor
-            if self.add_anchor_in_md:
-                content = [batch_convert_citations(line) for line in content]
-            n2 = "2_generate" + ".md"
-            write_list(content, n2, "w", path_temp)
+            sections = [original_md]
+            if self.incremental_sections_in_md and sections_md is not None and len(sections_md) > 1:
+                sections = [PandocMdTo._split_lines("".join(section)) for section in sections_md]
+            elif self.incremental_sections_in_md:
+                sections = self._split_sections(original_md)
+
+            content_sections = []
+            for section in sections:
+                # generate by replacing `- [@citation_key]` to `- [citation_key]`
+                content, nocite_keys = list(section), []
+                if self.replace_cite_to_fullcite_in_md:
+                    for i in range(len(content)):
+                        mch = _REGEX_BULLET_CITE.match(content[i])
+                        if not (mch and mch.group(2) in key_url_http_bib_dict):
+                            continue
+
+                        content[i] = content[i].replace(mch.group(), mch.group(1) + "[" + mch.group(2) + "]")
+                        nocite_keys.append(mch.group(2))
+                # add anchor
+                if self.add_anchor_in_md:
+                    content = [batch_convert_citations(line) for line in content]
+                # keep the references of the replaced citations, so one citeproc pass renders the body and all
+                # references
+                if nocite_keys:
+                    content = [*delete_empty_lines_last_occur_add_new_line(content), *self._nocite_block(nocite_keys)]
+                content_sections.append(content)
+            self._write_temp(combine_content_in_list(content_sections), "1_generate" + ".md", path_temp)
 
             # pandoc markdown to markdown
-            n3 = "3_pandoc" + ".md"
-            data_list_md = self._pandoc_md_to.pandoc_md_to_md(full_bib_for_abbr, path_temp, path_temp, n2, n3)
+            if len(content_sections) == 1:
+                data_list_md = self._pandoc_md_to.pandoc_md_to_md_piped(full_bib_for_abbr, content_sections[0])
+            else:
+                data_list_md = self._pandoc_md_to.pandoc_md_to_md_sections(full_bib_for_abbr, content_sections)
+            self._write_temp(data_list_md, "2_pandoc" + ".md", path_temp)
+            if not data_list_md:
+                return content_md
+
+            key_basic_dict, key_beauty_dict, key_complex_dict = self._pandoc_md_to.generate_key_data_dict(
+                data_list_md, key_url_http_bib_dict
+            )
 
             # generate by replacing `- [citation_key]` to `- reference`
             if self.replace_cite_to_fullcite_in_md:
-                regex = re.compile(r"(\s*)([-\+\*])(\s*)[\\]*\[({})[\\]*\]".format("|".join(key_in_md)))
+                if self.replace_by_basic_beauty_complex_in_md.lower() == "basic":
+                    key_reference_dict = key_basic_dict
+                elif self.replace_by_basic_beauty_complex_in_md.lower() == "complex":
+                    key_reference_dict = key_complex_dict
+                else:
+                    key_reference_dict = key_beauty_dict
+
                 for i in range(len(data_list_md)):
-                    if not (mch := regex.search(data_list_md[i])):
+                    if not (mch := self._search_bullet_key(data_list_md[i], key_reference_dict)):
                         continue
 
                     space_one, b, space_two, cite_key = mch.groups()
-                    if self.replace_by_basic_beauty_complex_in_md.lower() == "basic":
-                        temp_list = copy.deepcopy(key_basic_dict[cite_key])
-                    elif self.replace_by_basic_beauty_complex_in_md.lower() == "complex":
-                        temp_list = copy.deepcopy(key_complex_dict[cite_key])
-                    else:
-                        temp_list = copy.deepcopy(key_beauty_dict[cite_key])
-
-                    temp = "".join(self._special_format(temp_list, space_one, space_two))
+                    fragment = key_reference_dict[cite_key.replace("\\", "")]
+
+                    # align the continuation lines with the text of the list item
+                    temp = "".join(indent_reference(fragment, "", space_one + " " + space_two))
                     data_list_md[i] = data_list_md[i].replace(mch.group(), space_one + b + space_two + temp.strip())
-            n4 = "4_generate" + ".md"
-            write_list(data_list_md, os.path.join(path_temp, n4), "w")
+            self._write_temp(data_list_md, "3_generate" + ".md", path_temp)
 
             # obtain footnote part (in the last part of the contents)
             main_part, last_part = [], []
@@ -277,25 +321,48 @@ class PythonRunMd(BasicInput):
         return content_md
 
     @staticmethod
-    def _special_format(temp_list: list[str], space_one: str, space_two: str) -> list[str]:
-        """Apply special formatting for alignment.
+    def _split_sections(data_list_md: list[str]) -> list[list[str]]:
+        """Split markdown content before every `#` or `##` heading outside code blocks."""
+        sections: list[list[str]] = [[]]
+        fence = ""
+        for line in data_list_md:
+            stripped = line.lstrip()
+            if fence:
+                if stripped.startswith(fence):
+                    fence = ""
+            elif stripped.startswith(("```", "~~~")):
+                fence = stripped[:3]
+            elif (
+                _REGEX_SECTION_HEADING.match(line)
+                and any(x.strip() for x in sections[-1])
+                and not sections[-1][-1].strip()  # pandoc needs a blank line before a heading
+            ):
+                sections.append([])
+            sections[-1].append(line)
+        return sections
 
-        Args:
-            temp_list (list[str]): list of strings to format.
-            space_one (str): First space string.
-            space_two (str): Second space string.
+    @staticmethod
+    def _search_bullet_key(line: str, key_reference_dict: dict[str, tuple[str, ...]]) -> re.Match | None:
+        """Search the first bullet item `- [citation_key]` whose key (markdown escapes removed) is in the dict."""
+        for mch in _REGEX_BULLET_KEY.finditer(line):
+            if mch.group(4).replace("\\", "") in key_reference_dict:
+                return mch
+        return None
 
-        Returns:
-            list[str]: Formatted list of strings.
-        """
-        for j in range(len(temp_list) - 1):
-            if temp_list[j][-1] == "\n":
-                temp_list[j + 1] = (space_one + " " + space_two) + temp_list[j + 1]
-        return temp_list
+    @staticmethod
+    def _nocite_block(keys: list[str]) -> list[str]:
+        """YAML metadata block adding references of keys which are not cited in the text."""
+        return ["\n", "---\n", "nocite: |\n", "  " + ", ".join(f"@{k}" for k in dict.fromkeys(keys)) + "\n", "...\n"]
+
+    @staticmethod
+    def _write_temp(data_list: list[str], file_name: str, path_temp: str) -> None:
+        if path_temp:
+            write_list(data_list, file_name, "w", path_temp, False)
+        return None
 
     def _generate_content_md(
         self,
-        key_basic_beauty_complex_dict: dict[str, list[str]],
+        key_basic_beauty_complex_dict: dict[str, tuple[str, ...]],
         key_in_md_tex: list[str],
         main_part: list[str],
         last_part: list[str],
@@ -304,7 +371,7 @@ class PythonRunMd(BasicInput):
         """Generate markdown content from various components.
 
         Args:
-            key_basic_beauty_complex_dict (dict[str, list[str]]): dictionary of formatted references.
+            key_basic_beauty_complex_dict (dict[str, tuple[str, ...]]): dictionary of formatted references.
             key_in_md_tex (list[str]): list of citation keys in markdown/LaTeX.
             main_part (list[str]): Main content part.
             last_part (list[str]): Last content part.
@@ -313,8 +380,11 @@ class PythonRunMd(BasicInput):
         Returns:
             list[str]: Generated markdown content.
         """
-        temp_b = []
+        content_md = [*main_part, "\n"]
         if self.add_reference_in_md:
-            temp_b = combine_content_in_list([key_basic_beauty_complex_dict[k] for k in key_in_md_tex], ["\n"])
-        content_md = combine_content_in_list([main_part, ["\n"], temp_b, last_part, bib_in_md])
+            for k in key_in_md_tex:
+                content_md.extend(key_basic_beauty_complex_dict[k])
+                content_md.append("\n")
+        content_md.extend(last_part)
+        content_md.extend(bib_in_md)
         return content_md
@@ -1,12 +1,60 @@
 import os
 import re
 import shutil
-import subprocess
+from collections.abc import Sequence
 from typing import Any
 
-from pyadvtools import delete_files, insert_list_in_list, read_list, write_list
+from pyadvtools import delete_files, read_list, write_list
 
 from .basic_input import BasicInput
+from .latex_builds import LatexJob, compile_latex, latex_build_path, latex_preamble_format, split_preamble
+from .toolchain import default_cache_path, has_tool, report_missing
+
+_REGEX_DOCUMENTCLASS = re.compile(r"\\documentclass")
+_DEFAULT_BIB_RESOURCE = r"\addbibresource{./bibs/abbr.bib}"
+
+
+class TexTemplate:
+    r"""LaTeX template split once into fixed parts and named insertion slots.
+
+    The slot "documentclass" follows the first line containing `\documentclass`, and the slot "bib" replaces
+    every `\addbibresource{./bibs/abbr.bib}` line. The parts are tuples, so rendering never changes them.
+
+    Args:
+        data_list (Sequence[str]): Lines of the template.
+        documentclass_slot (bool): Whether to add the "documentclass" slot. Defaults to True.
+    """
+
+    def __init__(self, data_list: Sequence[str], documentclass_slot: bool = True) -> None:
+        parts: list[tuple[str, ...] | str] = []
+        lines: list[str] = []
+        for line in data_list:
+            if line.rstrip() == _DEFAULT_BIB_RESOURCE:
+                parts.extend([tuple(lines), "bib"])
+                lines = []
+            elif documentclass_slot and _REGEX_DOCUMENTCLASS.search(line):
+                documentclass_slot = False
+                parts.extend([(*lines, line), "documentclass"])
+                lines = []
+            else:
+                lines.append(line)
+        parts.append(tuple(lines))
+        self.parts = tuple(parts)
+
+    def render(self, slots: dict[str, Sequence[str]], data_list: list[str] | None = None) -> list[str]:
+        """Lines of the template with the slots filled.
+
+        Args:
+            slots (dict[str, Sequence[str]]): Lines of every slot, missing slots are left empty.
+            data_list (list[str] | None): List extended with the lines. Defaults to None (a new list).
+
+        Returns:
+            list[str]: `data_list` extended with the lines.
+        """
+        data_list = [] if data_list is None else data_list
+        for part in self.parts:
+            data_list.extend(slots.get(part, ()) if isinstance(part, str) else part)
+        return data_list
 
 
 class PythonRunTex(BasicInput):
@@ -36,6 +84,15 @@ class PythonRunTex(BasicInput):
             overwrite existing output files with the same name. When True,
             duplicates are replaced; when False, new names may be generated.
             Defaults to False.
+        latex_timeout (float | None): Seconds before a latexmk run is killed. Defaults to None (no limit).
+        latex_preamble_format (bool): Whether to compile with a precompiled format of the preamble
+            (requires mylatexformat), cached by preamble and engine. Defaults to False.
+        latex_format_cache_path (str): Directory of the precompiled formats. Defaults to "" (`latex-formats`
+            in the pyeasyphd cache directory).
+        latex_incremental_build (bool): Whether to compile in a persistent build directory, keeping aux files
+            between runs, and to skip the compilation when no input of the last one changed. Defaults to False.
+        latex_build_path (str): Directory of the build directories. Defaults to "" (`latex` in the pyeasyphd
+            cache directory).
     """
 
     def __init__(self, options: dict[str, Any]) -> None:
@@ -53,6 +110,14 @@ class PythonRunTex(BasicInput):
         self.delete_run_latex_cache: bool = options.get("delete_run_latex_cache", True)
         self.latex_clean_file_types: list[str] | None = options.get("latex_clean_file_types", None)
         self.replace_duplicate_output_tex_file: bool = options.get("replace_duplicate_output_tex_file", False)
+        self.latex_timeout: float | None = options.get("latex_timeout", None)
+        self.latex_preamble_format: bool = options.get("latex_preamble_format", False)
+        self.latex_format_cache_path: str = options.get("latex_format_cache_path", "")
+        self.latex_incremental_build: bool = options.get("latex_incremental_build", False)
+        self.latex_build_path: str = options.get("latex_build_path", "")
+
+        # Templates parsed once per instance, by name
+        self._tex_templates: dict[str, TexTemplate] = {}
 
     def generate_standard_tex_data_list(
         self,
@@ -94,6 +159,11 @@ class PythonRunTex(BasicInput):
         )
         return data_list_body
 
+    def _tex_template(self, name: str, data_list: Sequence[str], documentclass_slot: bool = True) -> TexTemplate:
+        if (template := self._tex_templates.get(name)) is None:
+            template = self._tex_templates[name] = TexTemplate(data_list, documentclass_slot)
+        return template
+
     def _special_operate_tex(
         self,
         data_list_body: list[str],
@@ -122,14 +192,6 @@ class PythonRunTex(BasicInput):
         elif template_name.lower() == "beamer":
             template_h, template_t = self.beamer_template_header_tex, self.beamer_template_tail_tex
 
-        # style
-        if usepackages := self.usepackages_tex:
-            usepackages.insert(0, "\n")
-
-        # command
-        if math_commands := self.math_commands_tex:
-            math_commands.insert(0, "\n")
-
         # main name
         main_name = self.final_output_main_tex_name
         if len(main_name) == 0:
@@ -141,26 +203,27 @@ class PythonRunTex(BasicInput):
 
         data_list = []
         if (len(template_h) != 0) and (len(template_t) != 0):
-            # header
-            data_list = insert_list_in_list(template_h, usepackages, r"\\documentclass", "after")
-            data_list = insert_list_in_list(data_list, math_commands, r"\\documentclass", "after")
-
-            if template_name.lower() == "beamer":
-                data_list = insert_list_in_list(data_list, ["\n\\def\\allfiles{}\n"], r"\\documentclass", "after")
+            # for bib
+            if bib_folder_name:
+                bib = ["\\addbibresource{" + f"./{bib_folder_name}/{bib_name}" + "}\n"]
+            else:
+                bib = ["\\addbibresource{" + f"./{bib_name}" + "}\n"]
 
+            # header: definitions, commands and style after `\documentclass`
+            preamble = []
             if self.pdflatex_xelatex == "xelatex":
-                data_list = insert_list_in_list(data_list, ["\n\\def\\cn{}\n"], r"\\documentclass", "after")
-
-            # for bib
-            expected = r'\addbibresource{./bibs/abbr.bib}'
-            for i in range(len(data_list)):
-                mch = expected == data_list[i].rstrip()
-                if not mch:
-                    continue
-                if bib_folder_name:
-                    data_list[i] = "\\addbibresource{" + f"./{bib_folder_name}/{bib_name}" + "}\n"
-                else:
-                    data_list[i] = "\\addbibresource{" + f"./{bib_name}" + "}\n"
+                preamble.append("\n\\def\\cn{}\n")
+            if template_name.lower() == "beamer":
+                preamble.append("\n\\def\\allfiles{}\n")
+            if self.math_commands_tex:
+                preamble.append("\n")
+                self._tex_template("math_commands", self.math_commands_tex, False).render({"bib": bib}, preamble)
+            if self.usepackages_tex:
+                preamble.append("\n")
+                self._tex_template("usepackages", self.usepackages_tex, False).render({"bib": bib}, preamble)
+            data_list = self._tex_template(f"{template_name.lower()}_header", template_h).render(
+                {"documentclass": preamble, "bib": bib}
+            )
 
             # body
             if len(data_list_body) != 0:
@@ -179,15 +242,36 @@ class PythonRunTex(BasicInput):
 
         # run latex
         if self.run_latex:
-            if shutil.which("latexmk"):
-                os.chdir(path_output)
-                cmd = f"latexmk -{self.pdflatex_xelatex} {main_name}"
-                try:
-                    subprocess.run(cmd.split(), check=True, capture_output=True, text=True)
-                except subprocess.CalledProcessError as e:
-                    print("Error in Run LaTex:", e.stderr)
+            if not has_tool(self.pdflatex_xelatex):
+                report_missing(self.pdflatex_xelatex, f"{self.pdflatex_xelatex} not found. Please install Texlive.")
+            elif has_tool("latexmk"):
+                # relative paths in the tex file are resolved in the output folder, without changing the cwd
+                full_fmt = ""
+                if self.latex_preamble_format and (preamble := split_preamble(data_list)):
+                    full_fmt = latex_preamble_format(
+                        preamble, self.pdflatex_xelatex, self.latex_format_cache_path, path_output, self.latex_timeout
+                    )
+                full_main = os.path.join(path_output, main_name)
+                path_build = path_output
+                if self.latex_incremental_build:
+                    # aux files stay in a persistent build directory, so latexmk only reruns what is needed
+                    path_root = self.latex_build_path or os.path.join(default_cache_path(), "latex")
+                    path_build = latex_build_path(path_root, full_main)
+
+                job = LatexJob(
+                    full_main,
+                    self.pdflatex_xelatex,
+                    path_build,
+                    path_output,
+                    self.latex_timeout,
+                    full_fmt,
+                    self.latex_incremental_build,
+                )
+                result = compile_latex(job)
+                if result.success and path_build != path_output:
+                    shutil.copyfile(job.output(".pdf"), os.path.join(path_output, os.path.basename(job.output(".pdf"))))
             else:
-                print("latexmk not found. Please install Texlive.")
+                report_missing("latexmk", "latexmk not found. Please install Texlive.")
 
         # delete cache
         if self.delete_run_latex_cache:
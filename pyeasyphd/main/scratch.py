@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from typing import Self
+
+# tmpfs of Linux; safe as a root because every workspace is a private `mkdtemp` directory in it
+_SHM_PATH = "/dev/shm"  # noqa: S108
+
+
+def default_scratch_root() -> str:
+    """Fast location for scratch files: the tmpfs `/dev/shm` when usable, else the temporary directory."""
+    if os.path.isdir(_SHM_PATH) and os.access(_SHM_PATH, os.W_OK | os.X_OK):
+        return _SHM_PATH
+    return tempfile.gettempdir()
+
+
+class ScratchWorkspace:
+    """Unique scratch directories for intermediate files which are deleted after a run.
+
+    The workspace is one directory created lazily under `path_root`, so concurrent runs never collide.
+    Named subdirectories are emptied whenever they are requested again, and the whole workspace is removed
+    by `cleanup` (`PyRunBibMdTex` calls it after every document), at the end of a `with` block, when the
+    workspace is garbage collected, or at exit. A later `directory` call creates a new workspace.
+
+    Args:
+        path_root (str): Location of the workspace. Defaults to "" (`default_scratch_root()`).
+    """
+
+    def __init__(self, path_root: str = "") -> None:
+        self.path_root = path_root or default_scratch_root()
+        self._path = ""
+        self._lock = threading.Lock()
+        self._finalizer: weakref.finalize | None = None
+
+    def directory(self, name: str) -> str:
+        """Empty scratch directory.
+
+        Args:
+            name (str): Name of the directory in the workspace, such as "bibs".
+
+        Returns:
+            str: Full path of the directory, emptied if it was used for a previous document.
+        """
+        with self._lock:
+            if not self._path or not os.path.isdir(self._path):
+                if self._finalizer is not None:
+                    self._finalizer.detach()  # the directory has been removed by someone else
+                os.makedirs(self.path_root, exist_ok=True)
+                self._path = tempfile.mkdtemp(prefix="pyeasyphd-", dir=self.path_root)
+                self._finalizer = weakref.finalize(self, shutil.rmtree, self._path, True)
+
+            path_directory = os.path.join(self._path, name)
+            shutil.rmtree(path_directory, ignore_errors=True)
+            os.makedirs(path_directory)
+            return path_directory
+
+    def cleanup(self) -> None:
+        """Remove the workspace and all its directories."""
+        with self._lock:
+            if self._finalizer is not None:
+                self._finalizer()  # removes the directory once
+                self._finalizer, self._path = None, ""
+        return None
+
+    def __enter__(self) -> Self:
+        """Use the workspace in a `with` block."""
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Remove the workspace at the end of the `with` block."""
+        self.cleanup()
+        return None
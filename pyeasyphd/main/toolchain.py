@@ -0,0 +1,148 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from typing import Any
+
+# Probed tools: name -> (command printing the version, regex of the version)
+_TOOLS = {
+    "pandoc": (["--version"], r"pandoc(?:\.exe)?\s+([\d.]+)"),
+    "pandoc-citeproc": (["--version"], r"pandoc-citeproc\s+([\d.]+)"),
+    "pandoc-server": (["--version"], r"([\d.]+)"),
+    "latexmk": (["-v"], r"Version\s+([\w.]+)"),
+    "xelatex": (["--version"], r"(\d[\d.]*)"),
+    "pdflatex": (["--version"], r"(\d[\d.]*)"),
+    "lualatex": (["--version"], r"(\d[\d.]*)"),
+}
+
+_TOOLCHAIN: dict[str, dict[str, Any]] | None = None
+_TOOLCHAIN_LOCK = threading.Lock()
+_REPORTED: set[str] = set()
+
+
+def default_cache_path() -> str:
+    """Directory of the pyeasyphd caches kept across processes, such as `~/.cache/pyeasyphd`."""
+    path_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(path_cache, "pyeasyphd")
+
+
+def default_toolchain_cache() -> str:
+    """Full path of the file caching probe results across processes."""
+    return os.path.join(default_cache_path(), "toolchain.json")
+
+
+def probe_toolchain(full_cache: str | None = None, refresh: bool = False) -> dict[str, dict[str, Any]]:
+    """Probe pandoc, latexmk and the LaTeX engines once per process.
+
+    Results are cached on disk by executable path and mtime, so a tool is only run again after it has been
+    installed, upgraded or moved.
+
+    Args:
+        full_cache (str | None): Full path of the cache file. Defaults to None (`default_toolchain_cache()`).
+        refresh (bool): Whether to probe again in this process. Defaults to False.
+
+    Returns:
+        dict[str, dict[str, Any]]: For every tool, "path" ("" if not found), "mtime", "version" and
+            "features". Pandoc features are "citeproc" (built-in `--citeproc`), "csljson", "server" and
+            "pdf_engines" (engines found on PATH).
+    """
+    global _TOOLCHAIN
+    with _TOOLCHAIN_LOCK:
+        if _TOOLCHAIN is not None and not refresh:
+            return _TOOLCHAIN
+
+        full_cache = full_cache or default_toolchain_cache()
+        try:
+            with open(full_cache, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = {}
+
+        toolchain = {}
+        for name in _TOOLS:
+            path = shutil.which(name) or ""
+            mtime = os.path.getmtime(path) if path else 0.0
+            info = cached.get(name, {})
+            if info.get("path") != path or info.get("mtime") != mtime:
+                info = {"path": path, "mtime": mtime, **_probe_version(name, path)}
+            toolchain[name] = info
+
+        engines = [e for e in ("xelatex", "pdflatex", "lualatex") if toolchain[e]["path"]]
+        toolchain["pandoc"]["features"]["pdf_engines"] = engines
+
+        if toolchain != cached:
+            try:
+                os.makedirs(os.path.dirname(full_cache), exist_ok=True)
+                with open(full_cache, "w", encoding="utf-8", newline="\n") as f:
+                    json.dump(toolchain, f, indent=4)
+            except OSError:
+                pass
+
+        _TOOLCHAIN = toolchain
+        return toolchain
+
+
+def _probe_version(name: str, path: str) -> dict[str, Any]:
+    version, features = "", {}
+    if path:
+        args, regex = _TOOLS[name]
+        try:
+            result = subprocess.run([path, *args], check=False, capture_output=True, text=True, timeout=30)
+            output = result.stdout + result.stderr
+        except (OSError, subprocess.SubprocessError):
+            output = ""
+        if mch := re.search(regex, output):
+            version = mch.group(1)
+
+        if name == "pandoc":
+            numbers = version_tuple(version) or (99,)  # an unknown version is taken as a recent one
+            features = {
+                "citeproc": numbers >= (2, 11),
+                "csljson": numbers >= (2, 11),
+                "server": numbers >= (3,) and "-server" not in output,
+            }
+    return {"version": version, "features": features}
+
+
+def version_tuple(version: str) -> tuple[int, ...]:
+    """Numeric parts of a version, such as (3, 1, 11) for "3.1.11"."""
+    return tuple(int(n) for n in re.findall(r"\d+", version))
+
+
+def has_tool(name: str) -> bool:
+    """Whether a probed tool is installed.
+
+    Args:
+        name (str): Tool name, such as "pandoc", "latexmk" or "xelatex".
+
+    Returns:
+        bool: Whether the tool is on PATH.
+    """
+    return bool(probe_toolchain().get(name, {}).get("path"))
+
+
+def has_pandoc_feature(feature: str) -> bool:
+    """Whether the installed pandoc supports a feature.
+
+    Args:
+        feature (str): "citeproc", "csljson" or "server".
+
+    Returns:
+        bool: Whether the feature is supported.
+    """
+    return bool(probe_toolchain()["pandoc"]["features"].get(feature, False))
+
+
+def report_missing(name: str, message: str) -> None:
+    """Print a message about a missing tool or feature once per process.
+
+    Args:
+        name (str): Name of the tool or feature.
+        message (str): Message to print.
+    """
+    if name not in _REPORTED:
+        _REPORTED.add(name)
+        print(message)
+    return None
@@ -1,3 +1,7 @@
+from typing import TYPE_CHECKING
+
+from ..utils.lazy_imports import lazy_module_attributes
+
 __all__ = [
     "run_article_md_daily_notes",
     "run_article_tex_submit",
@@ -18,17 +22,41 @@ __all__ = [
     "run_replace_to_standard_cite_keys",
 ]
 
-from .run_article_md import run_article_md_daily_notes
-from .run_article_tex import run_article_tex_submit
-from .run_beamer_tex import run_beamer_tex_weekly_reports
-from .run_compare import run_compare_bib_with_local, run_compare_bib_with_zotero
-from .run_format import run_format_bib_to_abbr_zotero_save, run_format_bib_to_save_by_entry_type
-from .run_generate import (
-    run_generate_c_yearly,
-    run_generate_j_e_weekly,
-    run_generate_j_monthly,
-    run_generate_j_weekly,
-    run_generate_j_yearly,
-)
-from .run_replace import run_replace_to_standard_cite_keys
-from .run_search import run_compare_after_search, run_search_for_files, run_search_for_screen
+# Script -> submodule defining it, imported on first access (the search and generate scripts load large tables)
+_LAZY_IMPORTS = {
+    "run_article_md_daily_notes": ".run_article_md",
+    "run_article_tex_submit": ".run_article_tex",
+    "run_beamer_tex_weekly_reports": ".run_beamer_tex",
+    "run_search_for_screen": ".run_search",
+    "run_search_for_files": ".run_search",
+    "run_compare_after_search": ".run_search",
+    "run_generate_c_yearly": ".run_generate",
+    "run_generate_j_e_weekly": ".run_generate",
+    "run_generate_j_weekly": ".run_generate",
+    "run_generate_j_monthly": ".run_generate",
+    "run_generate_j_yearly": ".run_generate",
+    "run_compare_bib_with_local": ".run_compare",
+    "run_compare_bib_with_zotero": ".run_compare",
+    "run_format_bib_to_save_by_entry_type": ".run_format",
+    "run_format_bib_to_abbr_zotero_save": ".run_format",
+    "run_replace_to_standard_cite_keys": ".run_replace",
+}
+
+if TYPE_CHECKING:
+    from .run_article_md import run_article_md_daily_notes
+    from .run_article_tex import run_article_tex_submit
+    from .run_beamer_tex import run_beamer_tex_weekly_reports
+    from .run_compare import run_compare_bib_with_local, run_compare_bib_with_zotero
+    from .run_format import run_format_bib_to_abbr_zotero_save, run_format_bib_to_save_by_entry_type
+    from .run_generate import (
+        run_generate_c_yearly,
+        run_generate_j_e_weekly,
+        run_generate_j_monthly,
+        run_generate_j_weekly,
+        run_generate_j_yearly,
+    )
+    from .run_replace import run_replace_to_standard_cite_keys
+    from .run_search import run_compare_after_search, run_search_for_files, run_search_for_screen
+
+
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_IMPORTS, __all__)
@@ -4,6 +4,10 @@ This module provides advanced tools for bibliography processing,
 search functionality, and content generation.
 """
 
+from typing import TYPE_CHECKING
+
+from ..utils.lazy_imports import lazy_module_attributes
+
 __all__ = [
     "LaTeXImportMerger",
     "PyRunBibMdTex",
@@ -12,8 +16,21 @@ __all__ = [
     "PaperLinksGenerator",
 ]
 
-from .generate.generate_from_bibs import generate_from_bibs_and_write
-from .generate.generate_links import PaperLinksGenerator
-from .py_merge_tex import LaTeXImportMerger
-from .py_run_bib_md_tex import PyRunBibMdTex
-from .search.search_keywords import Searchkeywords
+# Tool -> submodule defining it, imported on first access, so using one tool does not load the others
+_LAZY_IMPORTS = {
+    "LaTeXImportMerger": ".py_merge_tex",
+    "PyRunBibMdTex": ".py_run_bib_md_tex",
+    "Searchkeywords": ".search.search_keywords",
+    "generate_from_bibs_and_write": ".generate.generate_from_bibs",
+    "PaperLinksGenerator": ".generate.generate_links",
+}
+
+if TYPE_CHECKING:
+    from .generate.generate_from_bibs import generate_from_bibs_and_write
+    from .generate.generate_links import PaperLinksGenerator
+    from .py_merge_tex import LaTeXImportMerger
+    from .py_run_bib_md_tex import PyRunBibMdTex
+    from .search.search_keywords import Searchkeywords
+
+
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_IMPORTS, __all__)
@@ -6,6 +6,8 @@ from pyadvtools import standard_path, write_list
 from pybibtexer.tools.experiments_base import generate_standard_publisher_abbr_options_dict
 
 from ...main import PandocMdTo
+from ...utils.markdown_html import markdown_to_html
+from ...utils.utils import operate_on_generate_html
 from .generate_html import generate_html_content, generate_html_from_bib_data
 from .generate_library import generate_library_by_filters
 
@@ -172,8 +174,12 @@ def _combine_data(path_storage, path_root, path_output, combine_flag, options):
 
         # Process combined content
         if len(link) > 1:
-            write_list(link, f"{publisher}_link.md", "w", pp, False)
-            PandocMdTo({}).pandoc_md_to_html(pp, pp, f"{publisher}_link.md", f"{publisher}_link.html", True)
+            if (content := markdown_to_html(link)) is not None:
+                write_list([content], f"{publisher}_link.html", "w", pp, False)
+                operate_on_generate_html(os.path.join(pp, f"{publisher}_link.html"))
+            else:
+                write_list(link, f"{publisher}_link.md", "w", pp, False)
+                PandocMdTo({}).pandoc_md_to_html(pp, pp, f"{publisher}_link.md", f"{publisher}_link.html", True)
 
         # Clean up
         for name in ["_link"]:
@@ -5,6 +5,8 @@ from datetime import datetime
 
 from pyadvtools import standard_path
 
+from ...utils.markdown_html import markdown_file_to_html_file
+
 
 class PaperLinksGenerator:
     """Generate markdown files with paper links from JSON data."""
@@ -109,11 +111,15 @@ class PaperLinksGenerator:
         return None
 
     def _convert_md_to_html(self, folder_name, file_name):
-        """Convert markdown file to HTML using pandoc."""
+        """Convert markdown file to HTML, in process or using pandoc."""
         base_path = os.path.join(self.data_base_path, f"{folder_name}")
         file_md = os.path.join(base_path, f"{file_name}.md")
         file_html = os.path.join(base_path, f"{file_name}.html")
 
+        if markdown_file_to_html_file(file_md, file_html):
+            os.remove(file_md)
+            return None
+
         try:
             cmd = f"pandoc {file_md} -o {file_html}"
             subprocess.run(cmd.split(), check=True, capture_output=True, text=True)
@@ -361,11 +367,15 @@ class PaperLinksGenerator:
             return sorted(keywords)
 
     def _convert_md_to_html_keyword(self, folder_name, cj, keyword):
-        """Convert markdown file to HTML using pandoc."""
+        """Convert markdown file to HTML, in process or using pandoc."""
         base_path = os.path.join(self.data_base_path, folder_name, f"{cj.title()}_Keywords")
         file_md = os.path.join(base_path, f"{keyword.replace(' ', '_')}.md")
         file_html = os.path.join(base_path, f"{keyword.replace(' ', '_')}.html")
 
+        if markdown_file_to_html_file(file_md, file_html):
+            os.remove(file_md)
+            return None
+
         try:
             os.system(f"pandoc {file_md} -o {file_html}")
             os.remove(file_md)
@@ -1,13 +1,17 @@
+import copy
 import os
 import re
 import shutil
+import time
 from typing import Any
 
-from pyadvtools import combine_content_in_list, read_list, standard_path, write_list
-from pybibtexer.bib.bibtexparser import Library
+from pyadvtools import combine_content_in_list, read_list, standard_path, transform_to_data_list, write_list
+from pybibtexer.bib.bibtexparser import Entry, Library
+from pybibtexer.bib.core import ConvertStrToLibrary
 from pybibtexer.main import PythonRunBib, PythonWriters
 
 from ..main import BasicInput, PythonRunMd, PythonRunTex
+from ..main.scratch import ScratchWorkspace
 
 
 class PyRunBibMdTex(BasicInput):
@@ -80,6 +84,9 @@ class PyRunBibMdTex(BasicInput):
         self.delete_original_tex_in_output_folder = options.get("delete_original_tex_in_output_folder", False)
         self.delete_original_bib_in_output_folder = options.get("delete_original_bib_in_output_folder", False)
 
+        # Scratch files (such as bibs deleted after the run) go to a fast location, "" for /dev/shm or the temp dir
+        self.scratch = ScratchWorkspace(options.get("scratch_path", ""))
+
         # Configuration options
         self.generate_html = options.get("generate_html", False)
         self.generate_tex = options.get("generate_tex", True)
@@ -91,6 +98,10 @@ class PyRunBibMdTex(BasicInput):
         self._python_md = PythonRunMd(self.options)
         self._python_tex = PythonRunTex(self.options)
 
+        # Parsed bibliography kept between runs, with the signature of its bib files
+        self._warm_library: tuple[tuple, Library] | None = None
+        self._last_data_list_md_tex: list[str] = []
+
     def run_files(
         self, file_list_md_tex: list[str], output_prefix: str = "", output_level: str = "next"
     ) -> tuple[list[str], list[str]]:
@@ -136,7 +147,7 @@ class PyRunBibMdTex(BasicInput):
         data_list_md_tex = combine_content_in_list(data_list_list, ["\n"])
 
         content_md, content_tex = self.python_run_bib_md_tex(
-            output_prefix, data_list_md_tex, self.bib_path_or_file, output_level
+            output_prefix, data_list_md_tex, self.bib_path_or_file, output_level, data_list_list
         )
         return content_md, content_tex
 
@@ -146,6 +157,7 @@ class PyRunBibMdTex(BasicInput):
         data_list_md_tex: list[str],
         original_bib_data: list[str] | str | Library,
         output_level: str = "next",
+        data_list_list_md_tex: list[list[str]] | None = None,
     ) -> tuple[list[str], list[str]]:
         """Process BibTeX, Markdown and LaTeX content.
 
@@ -154,6 +166,8 @@ class PyRunBibMdTex(BasicInput):
             data_list_md_tex (list[str]): list of content lines (Markdown or LaTeX).
             original_bib_data (list[str] | str | Library): BibTeX data in various formats.
             output_level (str, optional): Output directory level ("previous", "current", or "next"). Defaults to "next".
+            data_list_list_md_tex (list[list[str]] | None, optional): Content lines of every input file, which
+                `data_list_md_tex` combines. Defaults to None.
 
         Returns:
             tuple[list[str], list[str]]: Tuple containing processed Markdown content and LaTeX content.
@@ -162,7 +176,9 @@ class PyRunBibMdTex(BasicInput):
         output_tex, output_md = output_prefix + ".tex", output_prefix + ".md"
 
         if len(data_list_md_tex) == 0:
-            original_bib_data = self._python_bib.parse_to_single_standard_library(original_bib_data)
+            original_bib_data = self._python_bib.parse_to_single_standard_library(
+                self._warm_library_copy(original_bib_data)
+            )
             if not original_bib_data.entries:
                 return [], []
 
@@ -185,7 +201,13 @@ class PyRunBibMdTex(BasicInput):
             os.makedirs(path_output)
         self.path_output_new = standard_path(path_output)
 
-        return self._python_run_bib_md_tex(output_md, output_tex, data_list_md_tex, original_bib_data)
+        try:
+            return self._python_run_bib_md_tex(
+                output_md, output_tex, data_list_md_tex, original_bib_data, data_list_list_md_tex
+            )
+        finally:
+            # Scratch files only live for one run
+            self.scratch.cleanup()
 
     def _python_run_bib_md_tex(
         self,
@@ -193,6 +215,7 @@ class PyRunBibMdTex(BasicInput):
         output_tex: str,
         data_list_md_tex: list[str],
         original_bib_data: list[str] | str | Library,
+        data_list_list_md_tex: list[list[str]] | None = None,
     ) -> tuple[list[str], list[str]]:
         """Process BibTeX, Markdown and LaTeX content.
 
@@ -201,31 +224,14 @@ class PyRunBibMdTex(BasicInput):
             output_tex (str): Output LaTeX filename.
             data_list_md_tex (list[str]): list of content lines (Markdown or LaTeX).
             original_bib_data (list[str] | str | Library): BibTeX data in various formats.
+            data_list_list_md_tex (list[list[str]] | None): Content lines of every input file. Defaults to None.
 
         Returns:
             tuple[list[str], list[str]]: Tuple containing processed Markdown content and LaTeX content.
         """
-        # Copy figures if enabled
-        if self.shutil_includegraphics_figs:
-            figure_names = self.search_subfile_names(data_list_md_tex, self.includegraphics_figs_postfixes)
-            self.shutil_copy_files(
-                self.includegraphics_figs_directory,
-                figure_names,
-                self.path_output_new,
-                self.fig_folder_name,
-                self.includegraphics_figs_in_relative_path,
-            )
-
-        # Copy input texs (texes) if enabled
-        if self.shutil_input_texs:
-            input_tex_names = self.search_subfile_names(data_list_md_tex, self.input_texs_postfixes)
-            self.shutil_copy_files(
-                self.input_texs_directory,
-                input_tex_names,
-                self.path_output_new,
-                self.tex_folder_name,
-                self.input_texs_in_relative_path,
-            )
+        # Copy figures and input texs (texes) if enabled
+        self._last_data_list_md_tex = data_list_md_tex
+        self._copy_subfiles(data_list_md_tex, self.shutil_includegraphics_figs, self.shutil_input_texs)
 
         # Extract citation keys from content
         key_in_md_tex = self.search_cite_keys(data_list_md_tex, self.tex_md_flag)
@@ -235,14 +241,17 @@ class PyRunBibMdTex(BasicInput):
         if key_in_md_tex:
             # Generate bib contents
             abbr_library, zotero_library, save_library = self._python_bib.parse_to_multi_standard_library(
-                original_bib_data, key_in_md_tex
+                self._warm_library_copy(original_bib_data, key_in_md_tex), key_in_md_tex
             )
 
             # Only for existing references
             key_in_md_tex = sorted(abbr_library.entries_dict.keys(), key=key_in_md_tex.index)
 
-            # Write bibliography files
-            _path_output = os.path.join(self.path_output_new, self.bib_folder_name)
+            # Write bibliography files, as scratch files if they are deleted afterwards and LaTeX does not read them
+            if self.delete_original_bib_in_output_folder and not (self.generate_tex and self._python_tex.run_latex):
+                _path_output = self.scratch.directory(self.bib_folder_name or "bibs")
+            else:
+                _path_output = os.path.join(self.path_output_new, self.bib_folder_name)
             full_bib_for_abbr, full_bib_for_zotero, full_bib_for_save = (
                 self._python_writer.write_multi_library_to_multi_file(
                     _path_output, abbr_library, zotero_library, save_library, key_in_md_tex
@@ -251,8 +260,10 @@ class PyRunBibMdTex(BasicInput):
 
         # Process content based on format
         if self.tex_md_flag == ".md":
-            # Write original markdown content
-            write_list(data_list_md_tex, output_md, "w", os.path.join(self.path_output_new, self.md_folder_name), False)
+            # Write original markdown content, unless it is deleted afterwards
+            if not self.delete_original_md_in_output_folder:
+                _path_output = os.path.join(self.path_output_new, self.md_folder_name)
+                write_list(data_list_md_tex, output_md, "w", _path_output, False)
 
             # Generate processed content and write to given files
             data_list_md, data_list_tex = self._python_md.special_operate_for_md(
@@ -264,6 +275,7 @@ class PyRunBibMdTex(BasicInput):
                 self.template_name,
                 self.generate_html,
                 self.generate_tex,
+                data_list_list_md_tex,
             )
         else:
             data_list_md, data_list_tex = [], data_list_md_tex
@@ -294,6 +306,150 @@ class PyRunBibMdTex(BasicInput):
 
         return data_list_md, data_list_tex
 
+    def _copy_subfiles(self, data_list_md_tex: list[str], figures: bool, input_texs: bool) -> None:
+        """Copy the figures and input texs used by the content to the output folder.
+
+        Args:
+            data_list_md_tex (list[str]): list of content lines (Markdown or LaTeX).
+            figures (bool): Whether to copy figures.
+            input_texs (bool): Whether to copy input texs.
+        """
+        if figures:
+            figure_names = self.search_subfile_names(data_list_md_tex, self.includegraphics_figs_postfixes)
+            self.shutil_copy_files(
+                self.includegraphics_figs_directory,
+                figure_names,
+                self.path_output_new,
+                self.fig_folder_name,
+                self.includegraphics_figs_in_relative_path,
+            )
+
+        if input_texs:
+            input_tex_names = self.search_subfile_names(data_list_md_tex, self.input_texs_postfixes)
+            self.shutil_copy_files(
+                self.input_texs_directory,
+                input_tex_names,
+                self.path_output_new,
+                self.tex_folder_name,
+                self.input_texs_in_relative_path,
+            )
+        return None
+
+    def _warm_library_copy(
+        self, original_bib_data: list[str] | str | Library, given_cite_keys: list[str] | None = None
+    ) -> list[str] | str | Library:
+        """Copy of the entries of a bib file or directory, parsed once and again only after the files changed.
+
+        Args:
+            original_bib_data (list[str] | str | Library): BibTeX data in various formats.
+            given_cite_keys (list[str] | None): Keys of the entries to copy. Defaults to None (all entries).
+
+        Returns:
+            list[str] | str | Library: Library owned by the caller, or `original_bib_data` if it is not a path.
+        """
+        if not (isinstance(original_bib_data, str) and os.path.exists(original_bib_data)):
+            return original_bib_data
+
+        signature = self.files_signature([original_bib_data], [".bib"])
+        if self._warm_library is None or self._warm_library[0] != signature:
+            _options = {**self._python_bib.options, "keep_entries_by_cite_keys": []}
+            data_list = transform_to_data_list(original_bib_data, extension=".bib")
+            self._warm_library = (signature, ConvertStrToLibrary(_options).generate_library(data_list))
+
+        # later steps modify the library and its entries in place; keys match case-insensitively, as in pybibtexer
+        keys = None if given_cite_keys is None else {k.lower() for k in given_cite_keys}
+        blocks = self._warm_library[1].blocks
+        return Library(
+            [copy.deepcopy(b) for b in blocks if keys is None or not isinstance(b, Entry) or b.key.lower() in keys]
+        )
+
+    @staticmethod
+    def files_signature(paths: list[str], postfixes: list[str] | None = None) -> tuple:
+        """Signature changing whenever a file (or a file in a directory) is added, removed or modified.
+
+        Args:
+            paths (list[str]): Files and directories.
+            postfixes (list[str] | None): Postfixes of the files in directories. Defaults to None (all files).
+
+        Returns:
+            tuple: Paths, modification times and sizes.
+        """
+        signature = []
+        for path in paths:
+            if os.path.isfile(path):
+                files = [path]
+            elif path and os.path.isdir(path):
+                files = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+                if postfixes is not None:
+                    files = [f for f in files if f.lower().endswith(tuple(postfixes))]
+            else:
+                files = []
+
+            for file in sorted(files):
+                try:
+                    stat = os.stat(file)
+                except OSError:
+                    continue
+                signature.append((file, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def watch(
+        self,
+        file_list_md_tex: list[str],
+        output_prefix: str = "",
+        output_level: str = "next",
+        interval: float = 0.5,
+        max_rebuilds: int | None = None,
+    ) -> None:
+        """Rebuild whenever the inputs change, until interrupted (Ctrl+C).
+
+        The input files, the bib file or directory, and the figure and input tex directories are polled. The
+        parsed bibliography, templates and helper objects stay warm between builds: a change of the content or
+        of the bibliography runs the pipeline again (the bibliography is parsed again only if it changed), and a
+        change of figures or input texs only copies them to the output folder. A failed build is reported and
+        watching goes on.
+
+        Args:
+            file_list_md_tex (list[str]): list of input file paths (Markdown or LaTeX).
+            output_prefix (str, optional): Prefix for output files. Defaults to "".
+            output_level (str, optional): Output directory level ("previous", "current", or "next"). Defaults to "next".
+            interval (float, optional): Seconds between polls. Defaults to 0.5.
+            max_rebuilds (int | None, optional): Stop after this number of builds. Defaults to None (never).
+        """
+        watched = {
+            "content": ([*file_list_md_tex, self.bib_path_or_file], None),
+            "figures": ([self.includegraphics_figs_directory], self.includegraphics_figs_postfixes),
+            "input_texs": ([self.input_texs_directory], self.input_texs_postfixes),
+        }
+
+        last: dict[str, tuple] = {}
+        rebuilds = 0
+        try:
+            while max_rebuilds is None or rebuilds < max_rebuilds:
+                # taken before building, so changes saved during a build trigger the next one
+                current = {k: self.files_signature(paths, postfixes) for k, (paths, postfixes) in watched.items()}
+                if changed := [k for k in current if current[k] != last.get(k)]:
+                    start = time.perf_counter()
+                    try:
+                        if not last or "content" in changed:
+                            self.run_files(file_list_md_tex, output_prefix, output_level)
+                        else:
+                            self._copy_subfiles(
+                                self._last_data_list_md_tex, "figures" in changed, "input_texs" in changed
+                            )
+                        print(f"Rebuilt ({', '.join(changed)}) in {time.perf_counter() - start:.2f} s.")
+                    except Exception as e:
+                        # the next change of the inputs builds again
+                        print(f"Build failed ({', '.join(changed)}): {e!r}")
+
+                    last = current
+                    rebuilds += 1
+                    continue
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        return None
+
     @staticmethod
     def search_subfile_names(data_list: list[str], postfixes: list[str]) -> list[str]:
         """Search for figure filenames in content.
@@ -0,0 +1,161 @@
+import base64
+import json
+import os
+import sys
+from array import array
+
+
+class HitMatrix:
+    """Compact, array-backed table of keyword search hit counts.
+
+    Every string column is interned in a string table, and a row is stored as integer ids in parallel
+    `array("I")` columns together with its hit count. Counting tables and new aggregations (per publisher,
+    per year, top-N, ...) are recomputed with `group_by` instead of re-running the search.
+
+    The `search` column numbers the searches of one venue and entry type, so that repeated searches of a keyword can
+    be told apart from the years of a single search.
+
+    Attributes:
+        columns (tuple[str, ...]): Names of the string columns.
+    """
+
+    columns = ("publisher", "venue", "year", "entry_type", "field", "keywords_type", "keyword", "search")
+
+    def __init__(self) -> None:
+        self._tables: dict[str, list[str]] = {c: [] for c in self.columns}
+        self._ids: dict[str, dict[str, int]] = {c: {} for c in self.columns}
+        self._arrays: dict[str, array] = {c: array("I") for c in (*self.columns, "count")}
+
+    def __len__(self) -> int:
+        """Number of rows."""
+        return len(self._arrays["count"])
+
+    def append(self, count: int, **values: str) -> None:
+        """Append one row.
+
+        Args:
+            count (int): Number of hits.
+            **values (str): Values of the string columns. Missing columns are stored as "".
+        """
+        for c in self.columns:
+            self._arrays[c].append(self._intern(c, values.get(c, "")))
+        self._arrays["count"].append(count)
+        return None
+
+    def extend(self, other: "HitMatrix", **overrides: str) -> None:
+        """Append all rows of another matrix.
+
+        Args:
+            other (HitMatrix): Matrix to append.
+            **overrides (str): Values replacing whole columns of `other`, such as `publisher="IEEE"`.
+        """
+        for c in self.columns:
+            if c in overrides:
+                self._arrays[c].extend([self._intern(c, overrides[c])] * len(other))
+            else:
+                remap = [self._intern(c, s) for s in other._tables[c]]
+                self._arrays[c].extend([remap[i] for i in other._arrays[c]])
+        self._arrays["count"].extend(other._arrays["count"])
+        return None
+
+    def group_by(self, *columns: str, last: tuple[str, ...] = ()) -> dict[tuple[str, ...], int]:
+        """Sum the hit counts grouped by the given columns.
+
+        Args:
+            *columns (str): Names of the string columns to group by.
+            last (tuple[str, ...]): Columns, such as `("publisher", "search")`, of which only the rows with the last
+                appended values of every group are summed. Defaults to () (all rows are summed).
+
+        Returns:
+            dict[tuple[str, ...], int]: Summed counts keyed by the column values.
+        """
+        grouped: dict[tuple[int, ...], int] = {}
+        tags: dict[tuple[int, ...], tuple[int, ...]] = {}
+        last_arrays = [self._arrays[c] for c in last]
+        for row, (*ids, count) in enumerate(
+            zip(*[self._arrays[c] for c in columns], self._arrays["count"], strict=True)
+        ):
+            key = tuple(ids)
+            if last_arrays:
+                # Rows of one search are appended together, so a new tag means a later search of the group
+                tag = tuple(a[row] for a in last_arrays)
+                if tags.get(key) != tag:
+                    tags[key] = tag
+                    grouped[key] = 0
+            grouped[key] = grouped.get(key, 0) + count
+
+        tables = [self._tables[c] for c in columns]
+        return {tuple(t[i] for t, i in zip(tables, key, strict=True)): n for key, n in grouped.items()}
+
+    def nested_dict(self, *columns: str, last: tuple[str, ...] = ()) -> dict:
+        """Sum the hit counts grouped by the given columns as a nested dictionary.
+
+        Args:
+            *columns (str): Names of the string columns, from the outermost to the innermost level.
+            last (tuple[str, ...]): Columns of which only the last appended values are summed, as in `group_by`.
+                Defaults to ().
+
+        Returns:
+            dict: Nested dictionary whose innermost values are the summed counts.
+        """
+        data_dict: dict = {}
+        for key, count in self.group_by(*columns, last=last).items():
+            temp = data_dict
+            for k in key[:-1]:
+                temp = temp.setdefault(k, {})
+            temp[key[-1]] = count
+        return data_dict
+
+    def save(self, full_file: str) -> None:
+        """Persist the matrix.
+
+        Args:
+            full_file (str): Full path of the output json file.
+        """
+        data = {
+            "byteorder": sys.byteorder,
+            "tables": self._tables,
+            "arrays": {c: base64.b64encode(a.tobytes()).decode("ascii") for c, a in self._arrays.items()},
+        }
+        if path := os.path.dirname(full_file):
+            os.makedirs(path, exist_ok=True)
+        with open(full_file, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(data, f)
+        return None
+
+    @classmethod
+    def load(cls, full_file: str) -> "HitMatrix":
+        """Load a persisted matrix.
+
+        Args:
+            full_file (str): Full path of the json file written by `save`.
+
+        Returns:
+            HitMatrix: Loaded matrix, or an empty one if the file does not exist.
+        """
+        hit_matrix = cls()
+        if not os.path.isfile(full_file):
+            return hit_matrix
+
+        with open(full_file, encoding="utf-8", newline="\n") as f:
+            data = json.load(f)
+
+        for c, encoded in data["arrays"].items():
+            hit_matrix._arrays[c] = array("I", base64.b64decode(encoded))
+            if data["byteorder"] != sys.byteorder:
+                hit_matrix._arrays[c].byteswap()
+        for c in cls.columns:
+            # Columns missing in files of older versions are stored as ""
+            if c not in data["tables"]:
+                hit_matrix._arrays[c] = array("I", [hit_matrix._intern(c, "")] * len(hit_matrix))
+                continue
+            hit_matrix._tables[c] = data["tables"][c]
+            hit_matrix._ids[c] = {s: i for i, s in enumerate(data["tables"][c])}
+        return hit_matrix
+
+    def _intern(self, column: str, value: str) -> int:
+        ids = self._ids[column]
+        if (i := ids.get(value)) is None:
+            i = ids[value] = len(self._tables[column])
+            self._tables[column].append(value)
+        return i
@@ -1,12 +1,40 @@
 import copy
+import hashlib
+import itertools
+import json
+import os
 import re
 
 from pybibtexer.bib.bibtexparser import Library
 from pybibtexer.main import PythonRunBib, PythonWriters
 
 from ...main import BasicInput
+from .hit_matrix import HitMatrix
 from .search_writers import WriteInitialResult, WriteSeparateResult
 
+# Version of the search logic in the cache keys and file names; bump it whenever searching changes.
+_SEARCH_HITS_VERSION = 1
+# Search hits shared by all `SearchHitsCache` instances of the process, oldest first, at most `_SEARCH_HITS_MAX`.
+_SEARCH_HITS: dict[str, list[str]] = {}
+_SEARCH_HITS_MAX = 200_000
+# Cache files which have already been merged into `_SEARCH_HITS`.
+_LOADED_CACHE_FILES: set[str] = set()
+
+
+def clear_search_hits_cache() -> None:
+    """Forget the search hits kept in memory; the cache files are loaded again when needed."""
+    _SEARCH_HITS.clear()
+    _LOADED_CACHE_FILES.clear()
+    return None
+
+
+def _remember_search_hits(hits: dict[str, list[str]]) -> None:
+    _SEARCH_HITS.update(hits)
+    if (excess := len(_SEARCH_HITS) - _SEARCH_HITS_MAX) > 0:
+        for cache_key in list(itertools.islice(_SEARCH_HITS, excess)):
+            del _SEARCH_HITS[cache_key]
+    return None
+
 
 def search_keywords_core(keywords_list_list: list[list[str]], library: Library, field: str) -> tuple[Library, Library]:
     """Search keywords in specified field such as title, abstract, or keywords.
@@ -43,6 +71,175 @@ def search_keywords_core(keywords_list_list: list[list[str]], library: Library,
     return Library(search_library), Library(no_search_library)
 
 
+class SearchHitsCache:
+    """Cache of keyword search hits partitioned by year.
+
+    Hits are stored per (venue, entry type, year, keywords type, keywords, field), so the hits of any year range
+    are obtained by merging the cached per-year partitions. Only years not yet cached are searched.
+
+    A search step only removes matched entries from the library, which makes the result of every step depend on the
+    entries of the same year only. The cache key therefore contains a fingerprint of the entries of the year and a
+    signature of the whole search plan (keywords, fields and deepcopy flags).
+
+    The per-year hit counts of every search are recorded in `hit_matrix`, also when the cache itself is disabled.
+
+    Args:
+        venue (str): Abbreviation of journal or conference.
+        entry_type (str): Entry type such as `article` or `inproceedings`.
+        year_entries_dict (dict[str, list]): Entries of every year.
+        search_field_list (list[str]): Fields being searched.
+        plan_signature (str): Signature of the search plan.
+        path_cache (str): Directory for persisting hits across runs. Defaults to "" (memory only).
+        use_cache (bool): Whether to look up and store hits. Defaults to True.
+
+    Attributes:
+        hit_matrix (HitMatrix): Per-year hit counts of all searches.
+        hit_years (int): Number of year partitions answered from the cache.
+        searched_years (int): Number of year partitions which have been searched.
+    """
+
+    def __init__(
+        self,
+        venue: str,
+        entry_type: str,
+        year_entries_dict: dict[str, list],
+        search_field_list: list[str],
+        plan_signature: str,
+        path_cache: str = "",
+        use_cache: bool = True,
+    ) -> None:
+        self.venue = venue
+        self.entry_type = entry_type
+        self.plan_signature = plan_signature
+
+        self._key_year_dict: dict[str, str] = {}
+        self._year_fingerprint_dict: dict[str, str] = {}
+        for year, entries in year_entries_dict.items():
+            sha = hashlib.sha256()
+            for entry in entries:
+                self._key_year_dict[entry.key] = year
+                sha.update(entry.key.encode("utf-8"))
+                for field in search_field_list:
+                    sha.update(b"\x00" + (entry[field] if field in entry else "").encode("utf-8"))
+            self._year_fingerprint_dict[year] = sha.hexdigest()
+
+        self.use_cache = use_cache
+        self.full_cache = ""
+        if path_cache and use_cache:
+            self.full_cache = os.path.join(path_cache, f"{venue}-v{_SEARCH_HITS_VERSION}.json")
+        if self.full_cache and self.full_cache not in _LOADED_CACHE_FILES:
+            _LOADED_CACHE_FILES.add(self.full_cache)
+            _remember_search_hits(self._load(self.full_cache))
+
+        self.hit_years = 0
+        self.searched_years = 0
+        self.hit_matrix = HitMatrix()
+        self._searches = 0
+        self._new_hits: dict[str, list[str]] = {}
+
+    def search(
+        self,
+        keywords_type: str,
+        combine_keywords: str,
+        keywords_list_list: list[list[str]],
+        library: Library,
+        field: str,
+    ) -> tuple[Library, Library]:
+        """Search keywords in the given field, answering cached years from the cache.
+
+        Args:
+            keywords_type (str): Type of keywords being searched.
+            combine_keywords (str): Combined keywords string.
+            keywords_list_list (list[list[str]]): list of keyword lists to search for.
+            library (Library): Bibliography library to search.
+            field (str): Field to search in.
+
+        Returns:
+            tuple[Library, Library]: Tuple containing (matching_library, non_matching_library).
+        """
+        year_entries_dict: dict[str, list] = {}
+        for entry in library.entries:
+            year_entries_dict.setdefault(self._key_year_dict.get(entry.key, ""), []).append(entry)
+
+        search_id = str(self._searches)
+        self._searches += 1
+
+        hit_keys: set[str] = set()
+        for year, entries in year_entries_dict.items():
+            cache_key = self._cache_key(year, keywords_type, keywords_list_list, field)
+            if self.use_cache and (keys := _SEARCH_HITS.get(cache_key)) is not None:
+                self.hit_years += 1
+            else:
+                search_library, _ = search_keywords_core(keywords_list_list, Library(entries), field)
+                keys = [entry.key for entry in search_library.entries]
+                self.searched_years += 1
+
+                # Entries without a known year are never cached
+                if self.use_cache and year:
+                    _remember_search_hits({cache_key: keys})
+                    self._new_hits[cache_key] = keys
+            hit_keys.update(keys)
+
+            self.hit_matrix.append(
+                len(keys),
+                venue=self.venue,
+                year=year,
+                entry_type=self.entry_type,
+                field=field,
+                keywords_type=keywords_type,
+                keyword=combine_keywords,
+                search=search_id,
+            )
+
+        search_library, no_search_library = [], []
+        for entry in library.entries:
+            if entry.key in hit_keys:
+                search_library.append(entry)
+            else:
+                no_search_library.append(entry)
+        return Library(search_library), Library(no_search_library)
+
+    def save(self) -> None:
+        """Persist the newly searched hits when a cache directory is given."""
+        if not (self.full_cache and self._new_hits):
+            return None
+
+        data_dict = self._load(self.full_cache)
+        data_dict.update(self._new_hits)
+        os.makedirs(os.path.dirname(self.full_cache), exist_ok=True)
+        with open(self.full_cache, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(data_dict, f)
+
+        self._new_hits = {}
+        return None
+
+    def _cache_key(self, year: str, keywords_type: str, keywords_list_list: list[list[str]], field: str) -> str:
+        data = [
+            _SEARCH_HITS_VERSION,
+            self.venue,
+            self.entry_type,
+            year,
+            self._year_fingerprint_dict.get(year, ""),
+            self.plan_signature,
+            keywords_type,
+            keywords_list_list,
+            field,
+        ]
+        return hashlib.sha256(json.dumps(data).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _load(full_cache: str) -> dict[str, list[str]]:
+        if not os.path.isfile(full_cache):
+            return {}
+
+        try:
+            with open(full_cache, encoding="utf-8", newline="\n") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading search cache {full_cache}: {e}")
+            return {}
+
+
 class SearchInitialResult(BasicInput):
     """Class for searching and processing initial results.
 
@@ -83,6 +280,7 @@ class SearchInitialResult(BasicInput):
         combine_keywords: str,
         output_prefix: str,
         path_separate: str,
+        search_cache: SearchHitsCache | None = None,
     ) -> tuple[list[str], dict[str, list[list[str]]], dict[str, int], Library]:
         """Main search method for processing search results.
 
@@ -95,6 +293,7 @@ class SearchInitialResult(BasicInput):
             combine_keywords (str): Combined keywords string.
             output_prefix (str): Prefix for output files.
             path_separate (str): Path to separate directory.
+            search_cache (SearchHitsCache | None): Cache and recorder of per-year search hits. Defaults to None.
 
         Returns:
             tuple[list[str], dict[str, list[list[str]]], dict[str, int], Library]: Tuple containing error messages, field data, field numbers, and remaining library.
@@ -107,7 +306,12 @@ class SearchInitialResult(BasicInput):
                 continue
 
             # Search
-            search_library, no_search_library = search_keywords_core(keywords_list_list, no_search_library, field)
+            if search_cache is None:
+                search_library, no_search_library = search_keywords_core(keywords_list_list, no_search_library, field)
+            else:
+                search_library, no_search_library = search_cache.search(
+                    keywords_type, combine_keywords, keywords_list_list, no_search_library, field
+                )
             field_number_dict.update({field: len(search_library.entries)})
 
             # Deepcopy library for every field
@@ -137,7 +341,9 @@ class SearchInitialResult(BasicInput):
             )
 
             # Separatelly write with the method 'a' for '_basic', '_beauty', '_complex'
-            WriteSeparateResult().main(copy.deepcopy(data_temp), field, keywords_type, combine_keywords, path_separate)
+            WriteSeparateResult(self.options).main(
+                copy.deepcopy(data_temp), field, keywords_type, combine_keywords, path_separate
+            )
 
             # Save for combined results
             field_data_dict.update({field: copy.deepcopy(data_temp)})
@@ -1,4 +1,5 @@
 import copy
+import json
 import os
 import re
 import shutil
@@ -18,7 +19,8 @@ from pybibtexer.bib.bibtexparser import Library
 from pybibtexer.main import PythonRunBib
 
 from ...main import BasicInput
-from .search_base import SearchInitialResult
+from .hit_matrix import HitMatrix
+from .search_base import SearchHitsCache, SearchInitialResult
 from .search_writers import WriteAbbrCombinedResults
 from .utils import keywords_type_for_title, switch_keywords_list, switch_keywords_type
 
@@ -49,6 +51,9 @@ class SearchResultsCore(BasicInput):
         first_field_second_keywords (bool): Whether to search fields first, then keywords.
         deepcopy_library_for_every_field (bool): Whether to deep copy library for every field.
         deepcopy_library_for_every_keywords (bool): Whether to deep copy library for every keywords.
+        use_search_hits_cache (bool): Whether to answer searched years from the per-year search hits cache.
+        search_hits_cache_path (str): Directory for persisting the per-year search hits across runs.
+        hit_matrix (HitMatrix): Per-year hit counts of all searches of this instance.
     """
 
     def __init__(
@@ -103,6 +108,12 @@ class SearchResultsCore(BasicInput):
         self.deepcopy_library_for_every_field = options.get("deepcopy_library_for_every_field", False)
         self.deepcopy_library_for_every_keywords = options.get("deepcopy_library_for_every_keywords", False)
 
+        # for search cache
+        self.use_search_hits_cache: bool = options.get("use_search_hits_cache", True)
+        self.search_hits_cache_path: str = options.get("search_hits_cache_path", "")
+        self._search_cache: SearchHitsCache | None = None
+        self.hit_matrix = HitMatrix()
+
         # for bib
         self._python_bib = PythonRunBib(options)
 
@@ -192,6 +203,18 @@ class SearchResultsCore(BasicInput):
             entries = IterateCombineExtendDict().dict_update(new_dict)
             library = Library(entries)
 
+            # search hits of years already searched are merged from the cache
+            year_entries_dict = {year: IterateCombineExtendDict().dict_update(new_dict[year]) for year in new_dict}
+            self._search_cache = SearchHitsCache(
+                self.j_conf_abbr,
+                entry_type,
+                year_entries_dict,
+                self.search_field_list,
+                self._search_plan_signature(),
+                self.search_hits_cache_path,
+                self.use_search_hits_cache,
+            )
+
             # search, generate and save
             keyword_type_keyword_field_number_dict = {}
             for keywords_type in self.keywords_dict:
@@ -212,8 +235,29 @@ class SearchResultsCore(BasicInput):
                 keyword_type_keyword_field_number_dict
             )
 
+            self._search_cache.save()
+            self.hit_matrix.extend(self._search_cache.hit_matrix)
+            self._search_cache = None
+
         return entry_type_keyword_type_keyword_field_number_dict
 
+    def _search_plan_signature(self) -> str:
+        """Signature of everything deciding which entries remain for every search step.
+
+        Returns:
+            str: Search plan signature.
+        """
+        return json.dumps(
+            [
+                self.keywords_dict,
+                self.search_field_list,
+                self.first_field_second_keywords,
+                self.deepcopy_library_for_every_field,
+                self.deepcopy_library_for_every_keywords,
+            ],
+            sort_keys=True,
+        )
+
     def _optimize_fields_keyword(self, keywords_type, library, output_prefix, p_origin, p_separate, p_combine):
         """Optimize search by fields first, then keywords.
 
@@ -309,6 +353,7 @@ class SearchResultsCore(BasicInput):
                 combine_keyword,
                 output_prefix,
                 p_separate,
+                self._search_cache,
             )
 
             if self.deepcopy_library_for_every_keywords:
@@ -10,8 +10,9 @@ from pybibtexer.tools.experiments_base import generate_standard_publisher_abbr_o
 from ...main import PandocMdTo
 from ...utils.utils import html_head, html_style, html_tail
 from .data import obtain_search_keywords
+from .hit_matrix import HitMatrix
 from .search_core import SearchResultsCore
-from .utils import extract_information, temp_html_style
+from .utils import extract_information_from_hit_matrix, temp_html_style
 
 
 class Searchkeywords:
@@ -65,8 +66,12 @@ class Searchkeywords:
         self._path_combine = self.path_output + "-Combine"
 
     def run(self) -> None:
-        """Run the keyword search process."""
-        all_dict = {}
+        """Run the keyword search process.
+
+        The per-year hit counts are persisted in `hit_matrix.json` of the statistics folder, so that counting
+        tables and new aggregations can be recomputed with `HitMatrix.load` without searching again.
+        """
+        hit_matrix = HitMatrix()
         publisher_abbr_dict = generate_standard_publisher_abbr_options_dict(self.path_storage, self.options)
         for publisher in publisher_abbr_dict:
             for abbr in publisher_abbr_dict[publisher]:
@@ -74,14 +79,14 @@ class Searchkeywords:
 
                 path_storage = os.path.join(self.path_storage, publisher, abbr)
                 path_output = os.path.join(self.path_output, publisher, abbr)
-                entry_type_keyword_type_keyword_field_number_dict = SearchResultsCore(
-                    path_storage, path_output, self._path_separate, abbr, options
-                ).optimize(copy.deepcopy(self.search_year_list))
+                search_results_core = SearchResultsCore(path_storage, path_output, self._path_separate, abbr, options)
+                search_results_core.optimize(copy.deepcopy(self.search_year_list))
 
-                all_dict.update({abbr: entry_type_keyword_type_keyword_field_number_dict})
+                hit_matrix.extend(search_results_core.hit_matrix, publisher=publisher)
 
         if not self.options.get("print_on_screen", False):
-            extract_information(all_dict, self._path_statistic)
+            hit_matrix.save(os.path.join(self._path_statistic, "hit_matrix.json"))
+            extract_information_from_hit_matrix(hit_matrix, self._path_statistic)
 
             print()
             self._generate_bib_html_for_publisher(publisher_abbr_dict, "bib")
@@ -181,10 +186,14 @@ class Searchkeywords:
         for root, _, files in os.walk(self._path_separate):
             mds.extend([os.path.join(root, f) for f in files if f.endswith(".md")])
 
+        # independent conversions run concurrently, bounded by the shared pandoc concurrency limit
+        pandoc_md_to = PandocMdTo({})
+        awaitables = []
         for full_md in mds:
             print(f"pandoc md to html for `{full_md.split(self._path_separate)[-1]}`")
             full_html = full_md.replace("-md", "-html").replace(".md", ".html")
-            PandocMdTo({}).pandoc_md_to_html(full_md, full_html, None, None, True)
+            awaitables.append(pandoc_md_to.pandoc_md_to_html_async(full_md, full_html, None, None, True))
+        pandoc_md_to.run_concurrently(awaitables)
 
     def _generate_link_to_html_bib_for_separate(self) -> None:
         for entry_type in (nested_dict := generate_nested_dict(self._path_separate)):
@@ -1,14 +1,53 @@
 import copy
 import os
+from typing import Any
 
 from pyadvtools import combine_content_in_list, read_list, write_list
 from pybibtexer.bib.bibtexparser import Library
 from pybibtexer.main import PythonWriters
 
 from ...main import BasicInput, PandocMdTo
+from ...main.pandoc_md_to import indent_reference
 from ...tools.search.utils import combine_keywords_for_file_name, combine_keywords_for_title, keywords_type_for_title
 
 
+def obtain_needed_outputs(options: dict[str, Any]) -> dict[str, set[str]]:
+    """Derive the outputs that survive `SearchResultsCore.delete_files` from the options.
+
+    Outputs which would be deleted right after being written are neither rendered nor written.
+
+    Args:
+        options (dict[str, Any]): Configuration options.
+
+    Returns:
+        dict[str, set[str]]: Needed file postfixes (such as `.tex`, `-abbr.bib`, `-beauty.md`)
+            for the `initial`, `separate`, and `combine` stages.
+    """
+    keep_all = not options.get("delete_redundant_files", True)
+
+    separate = {"-abbr.bib", "-zotero.bib", "-save.bib"}
+    combine = {"-abbr.bib", "-zotero.bib", "-save.bib"}
+    if keep_all or options.get("generate_tex", False):
+        combine.add(".tex")
+    if keep_all:
+        combine.add(".md")
+
+    for i in ["basic", "beauty", "complex"]:
+        generate_md = options.get(f"generate_{i}_md", i == "complex")
+        if keep_all or generate_md:
+            separate.add(f"-{i}.md")
+
+        # pdf and html files are converted from the combined md files
+        to_pdf = options.get(f"pandoc_md_{i}_to_pdf", False)
+        to_html = options.get(f"pandoc_md_{i}_to_html", i == "complex")
+        if keep_all or generate_md or to_pdf or to_html:
+            combine.add(f"-{i}.md")
+
+    # the md and abbr bib files are the inputs of pandoc
+    initial = {".md", "-abbr.bib"} | separate | combine
+    return {"initial": initial, "separate": separate, "combine": combine}
+
+
 class WriteInitialResult(BasicInput):
     """Write initial results for single keyword.
 
@@ -30,6 +69,7 @@ class WriteInitialResult(BasicInput):
         self._level_title_md = "###"
         self._level_title_tex = "subsection"
         self._pandoc_md_to = PandocMdTo(options)
+        self._needed_outputs = obtain_needed_outputs(options)["initial"]
 
     def main(
         self,
@@ -81,31 +121,40 @@ class WriteInitialResult(BasicInput):
         post_list = ["tex", "md", "bib", "bib", "bib"]
         path_write = os.path.join(path_initial, f"{field}-{keywords_type}")
         for i in range(len(post_list)):
+            if f"{mid_list[i]}.{post_list[i]}" not in self._needed_outputs:
+                continue
+
             file_name = f"{file_prefix}{mid_list[i]}.{post_list[i]}"
             _python_writer.write_to_file(data_list[i], file_name, "w", path_write)
 
-        # pandoc md to generate md file
-        path_bib = os.path.join(path_write, f"{file_prefix}{mid_list[2]}.bib")  # bib_for_abbr
-        data_list_pandoc_md = self._pandoc_md_to.pandoc_md_to_md(
-            path_bib, path_write, path_write, f"{file_prefix}.md", f"{file_prefix}-pandoc.md"
-        )
+        # only render the basic beauty complex md files which are needed
+        basic_beauty_complex = ["-basic", "-beauty", "-complex"]
+        needed_md = [f"{name}.md" in self._needed_outputs for name in basic_beauty_complex]
 
         # mian part
         # generate some md output data
         data_basic_md: list[str] = []
         data_beauty_md: list[str] = []
         data_complex_md: list[str] = []
-        if data_list_pandoc_md:
-            data_basic_md, data_beauty_md, data_complex_md = self.generate_basic_beauty_complex_md(
-                header, cite_keys, data_list_pandoc_md, library_for_zotero
+        if any(needed_md):
+            # pandoc md to generate md file
+            path_bib = os.path.join(path_write, f"{file_prefix}{mid_list[2]}.bib")  # bib_for_abbr
+            data_list_pandoc_md = self._pandoc_md_to.pandoc_md_to_md(
+                path_bib, path_write, path_write, f"{file_prefix}.md", f"{file_prefix}-pandoc.md"
             )
-        else:
-            error_pandoc_md_md.append(f"- pandoc full false: {file_prefix}_pandoc.md" + "\n")
+
+            if data_list_pandoc_md:
+                data_basic_md, data_beauty_md, data_complex_md = self.generate_basic_beauty_complex_md(
+                    header, cite_keys, data_list_pandoc_md, library_for_zotero
+                )
+            else:
+                error_pandoc_md_md.append(f"- pandoc full false: {file_prefix}_pandoc.md" + "\n")
 
         # write basic beauty complex md files
-        basic_beauty_complex = ["-basic", "-beauty", "-complex"]
-        for d, name in zip([data_basic_md, data_beauty_md, data_complex_md], basic_beauty_complex, strict=True):
-            write_list(d, f"{file_prefix}{name}.md", "w", path_write)
+        data_md = [data_basic_md, data_beauty_md, data_complex_md]
+        for d, name, needed in zip(data_md, basic_beauty_complex, needed_md, strict=True):
+            if needed:
+                write_list(d, f"{file_prefix}{name}.md", "w", path_write)
 
         # save all (tex, md, bib) files
         x = [f"{i}.{j}" for i, j in zip(mid_list, post_list, strict=True)]
@@ -141,32 +190,15 @@ class WriteInitialResult(BasicInput):
         if key_basic_dict and key_beauty_dict and key_complex_dict:
             data_basic_md, data_beauty_md, data_complex_md = [header + "\n"], [header + "\n"], [header + "\n"]
             for i in range(length := len(cite_key_list)):
-                data_basic_md.extend(self._convert_to_special_list(key_basic_dict.get(cite_key_list[i], [])))
-                data_beauty_md.extend(self._convert_to_special_list(key_beauty_dict.get(cite_key_list[i], [])))
-                data_complex_md.extend(self._convert_to_special_list(key_complex_dict.get(cite_key_list[i], [])))
+                data_basic_md.extend(indent_reference(key_basic_dict.get(cite_key_list[i], ()), "- ", "  "))
+                data_beauty_md.extend(indent_reference(key_beauty_dict.get(cite_key_list[i], ()), "- ", "  "))
+                data_complex_md.extend(indent_reference(key_complex_dict.get(cite_key_list[i], ()), "- ", "  "))
                 if i < (length - 1):
                     data_basic_md.append("\n")
                     data_beauty_md.append("\n")
                     data_complex_md.append("\n")
         return data_basic_md, data_beauty_md, data_complex_md
 
-    @staticmethod
-    def _convert_to_special_list(data_list: list[str]) -> list[str]:
-        """Convert data list to special formatted list.
-
-        Args:
-            data_list (list[str]): list of data strings.
-
-        Returns:
-            list[str]: Formatted list with proper indentation.
-        """
-        if len(data_list) > 0:
-            data_list[0] = "- " + data_list[0]
-        for j in range(len(data_list) - 1):
-            if data_list[j][-1] == "\n":
-                data_list[j + 1] = "  " + data_list[j + 1]
-        return data_list
-
     def generate_content_tex_md(
         self, cite_key_list: list[str], output_prefix: str, field: str, combine_keywords: str
     ) -> tuple[list[str], list[str], str]:
@@ -198,12 +230,24 @@ class WriteInitialResult(BasicInput):
 
 
 class WriteSeparateResult:
-    """Write separate result for different keyword types."""
+    """Write separate result for different keyword types.
+
+    Args:
+        options (dict | None): Configuration options. Defaults to None.
+    """
+
+    def __init__(self, options: dict | None = None) -> None:
+        """Initialize WriteSeparateResult with title levels.
+
+        Args:
+            options (dict | None): Configuration options. Defaults to None.
+        """
+        if options is None:
+            options = {}
 
-    def __init__(self) -> None:
-        """Initialize WriteSeparateResult with title levels."""
         self._level_title_md = "##"
         self._level_title_tex = "section"
+        self._needed_outputs = obtain_needed_outputs(options)["separate"]
 
     def main(
         self, data_temp: list[list[str]], field: str, keywords_type: str, combine_keywords: str, path_separate: str
@@ -228,6 +272,9 @@ class WriteSeparateResult:
         split_flag = mid_list.index("-abbr")
 
         for i in range(split_flag, len_data_temp):
+            if f"{mid_list[i]}.{post_list[i]}" not in self._needed_outputs:
+                continue
+
             path_temp = os.path.join(path_separate, f"{keywords_type}", f"{field}-{post_list[i]}{mid_list[i]}")
             full_file = os.path.join(path_temp, rf"{file_prefix}.{post_list[i]}")
             temp_data_list = read_list(data_temp[i][0], "r", None)
@@ -274,6 +321,7 @@ class WriteAbbrCombinedResults:
         self._level_title_md = "##"
         self._level_title_tex = "section"
         self._pandoc_md_to = PandocMdTo(options)
+        self._needed_outputs = obtain_needed_outputs(options)["combine"]
 
     def main(
         self, search_field_list, keywords_type: str, field_data_dict: dict[str, list[list[str]]], path_combine: str
@@ -303,6 +351,7 @@ class WriteAbbrCombinedResults:
         k_t_f_t = keywords_type_for_title(keywords_type)
 
         error_pandoc_md_pdf, error_pandoc_md_html = [], []
+        awaitables_pdf = []
         for field in search_field_list:
             if not field_data_dict.get(field):
                 continue
@@ -312,6 +361,9 @@ class WriteAbbrCombinedResults:
             _title = f"{field.title()} contains {k_t_f_t}"
 
             for j in range(0, len(post_list)):
+                if f"{mid_list[j]}.{post_list[j]}" not in self._needed_outputs:
+                    continue
+
                 temp = combine_content_in_list([read_list(file, "r") for file in field_data_dict[field][j]], ["\n"])
                 if post_list[j] == "md":
                     temp.insert(0, f"{self._level_title_md}" + " " + _title + "\n\n")
@@ -321,19 +373,20 @@ class WriteAbbrCombinedResults:
 
             # generate tex pdf html
             # for tex
-            self._pandoc_md_to.generate_tex_content(file_prefix, path_subsection, path_bib, path_combine)
+            if ".tex" in self._needed_outputs:
+                self._pandoc_md_to.generate_tex_content(file_prefix, path_subsection, path_bib, path_combine)
 
-            # for pdf
+            # for pdf, rendered concurrently for all fields below
             for i in ["basic", "beauty", "complex"]:
                 if eval(f"self.pandoc_md_{i}_to_pdf"):
-                    error_flag_pdf = self._pandoc_md_to.pandoc_md_to_pdf(
-                        os.path.join(path_combine, f"md-{i}"),
-                        f"{file_prefix}-{i}.md",
-                        os.path.join(path_combine, f"pdf-{i}"),
-                        f"{file_prefix}-{i}.pdf",
+                    awaitables_pdf.append(
+                        self._pandoc_md_to.pandoc_md_to_pdf_async(
+                            os.path.join(path_combine, f"md-{i}"),
+                            os.path.join(path_combine, f"pdf-{i}"),
+                            f"{file_prefix}-{i}.md",
+                            f"{file_prefix}-{i}.pdf",
+                        )
                     )
-                    if error_flag_pdf:
-                        error_pandoc_md_pdf.append(error_flag_pdf)
 
             # for html
             for i in ["basic", "beauty", "complex"]:
@@ -347,4 +400,8 @@ class WriteAbbrCombinedResults:
                     )
                     if error_flag_html:
                         error_pandoc_md_html.append(error_flag_html)
+
+        # each xelatex run is single-threaded, so run them in parallel (bounded by the CPU count)
+        if awaitables_pdf:
+            error_pandoc_md_pdf = [e for e in self._pandoc_md_to.run_concurrently(awaitables_pdf) if e]
         return error_pandoc_md_pdf, error_pandoc_md_html
@@ -3,6 +3,8 @@ import re
 
 from pyadvtools import IterateSortDict, is_list_contain_list_contain_str, is_list_contain_str, write_list
 
+from .hit_matrix import HitMatrix
+
 
 def switch_keywords_list(xx: list[str] | list[list[str]]) -> tuple[list[list[str]], str]:
     """Switch keyword list format and generate combined keywords string.
@@ -141,6 +143,34 @@ def extract_information(old_dict: dict[str, dict[str, dict[str, dict[str, dict[s
                             .update({abbr: no})
                         )
 
+    _write_keywords_count(new_dict, path_output)
+
+
+def extract_information_from_hit_matrix(hit_matrix: HitMatrix, path_output: str) -> None:
+    """Write the markdown tables of `extract_information` from a hit matrix.
+
+    As in `extract_information`, a keyword searched several times counts its last search only, and publishers sharing
+    a venue abbreviation count the last publisher only.
+
+    Args:
+        hit_matrix (HitMatrix): Per-year hit counts of the search.
+        path_output (str): Output directory path for generated markdown files.
+    """
+    new_dict = hit_matrix.nested_dict(
+        "entry_type", "field", "keywords_type", "keyword", "venue", last=("publisher", "search")
+    )
+    _write_keywords_count(new_dict, path_output)
+
+
+def _write_keywords_count(
+    new_dict: dict[str, dict[str, dict[str, dict[str, dict[str, int]]]]], path_output: str
+) -> None:
+    """Write `entry_type -> field -> keywords_type -> keyword -> abbr` counts into markdown tables.
+
+    Args:
+        new_dict (dict[str, dict[str, dict[str, dict[str, dict[str, int]]]]]): Nested dictionary of counts.
+        path_output (str): Output directory path for generated markdown files.
+    """
     new_dict = IterateSortDict(False).dict_update(new_dict)
 
     for entry_type in new_dict:
@@ -0,0 +1,30 @@
+import importlib
+import sys
+from collections.abc import Callable
+
+
+def lazy_module_attributes(
+    package: str, lazy_imports: dict[str, str], all_names: list[str]
+) -> tuple[Callable[[str], object], Callable[[], list[str]]]:
+    """Module `__getattr__` and `__dir__` importing the submodule defining an attribute on first access (PEP 562).
+
+    Args:
+        package (str): `__name__` of the package.
+        lazy_imports (dict[str, str]): Relative name of the submodule defining every lazy attribute.
+        all_names (list[str]): `__all__` of the package.
+
+    Returns:
+        tuple[Callable[[str], object], Callable[[], list[str]]]: `__getattr__` and `__dir__` of the package.
+    """
+
+    def module_getattr(name: str) -> object:
+        if (module_name := lazy_imports.get(name)) is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        setattr(sys.modules[package], name, value)  # later accesses skip __getattr__
+        return value
+
+    def module_dir() -> list[str]:
+        return sorted({*vars(sys.modules[package]), *all_names})
+
+    return module_getattr, module_dir
@@ -0,0 +1,206 @@
+import html
+import os
+import re
+
+# Inline markdown: links, strong, emphasis and code
+_REGEX_INLINE = re.compile(r"\[([^\[\]]*)\]\(([^()\s]*)\)|\*\*([^*]+)\*\*|\*([^*]+)\*|`([^`]+)`")
+# Characters whose meaning in plain text depends on pandoc extensions (smart quotes, escapes, raw html, ...)
+_REGEX_UNSUPPORTED = re.compile(r"[\\`*\[\]<>!\"'~^$@]|--|\.\.\.|(?<!\w)_|_(?!\w)")
+_REGEX_HEADING = re.compile(r"^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$")
+_REGEX_BULLET = re.compile(r"^[-+*]\s+(.*)$")
+_REGEX_TABLE_SEPARATOR = re.compile(r"^\|?(\s*:?-+:?\s*\|)*\s*:?-+:?\s*\|?\s*$")
+# Default `--columns` of pandoc; pipe tables with longer lines get relative column widths (`<colgroup>`)
+_PANDOC_COLUMNS = 72
+# Marks the spaces where pandoc may wrap a line of html (between words and before attributes)
+_BREAK = "\x00"
+
+
+def markdown_to_html(data_list: list[str]) -> str | None:
+    """Render the markdown of generated link and list pages to html, like `pandoc -o x.html --from markdown`.
+
+    Only the subset written by pyeasyphd is supported: ATX headings, single-line bullet items, pipe tables
+    whose lines fit in pandoc's default columns and paragraphs of ascii text, with links, strong, emphasis
+    and code inline. The output follows pandoc 3, including its wrapping of lines at 72 columns.
+
+    Args:
+        data_list (list[str]): Markdown content lines.
+
+    Returns:
+        str | None: Html content, or None if the markdown is outside the supported subset (use pandoc then).
+    """
+    content = "".join(data_list)
+    if not content.isascii() or _BREAK in content:
+        return None  # pandoc wraps by display width
+    lines = content.split("\n")
+    blocks, ids = [], {}
+
+    i = 0
+    while i < len(lines):
+        line = lines[i].rstrip()
+        if not line.strip():
+            i += 1
+        elif mch := _REGEX_HEADING.match(line):
+            if (text := _inline(mch.group(2))) is None:
+                return None
+            level = len(mch.group(1))
+            blocks.append(f'<h{level}{_BREAK}id="{_identifier(mch.group(2), ids)}">{text}</h{level}>')
+            i += 1
+        elif _REGEX_BULLET.match(line):
+            items = []
+            while i < len(lines) and (mch := _REGEX_BULLET.match(lines[i].rstrip())):
+                if (text := _inline(mch.group(1))) is None:
+                    return None
+                items.append(f"<li>{text}</li>")
+                i += 1
+            if i < len(lines) and lines[i].strip():
+                return None  # continuation lines
+            blocks.append("\n".join(["<ul>", *items, "</ul>"]))
+        elif line.startswith("|"):
+            rows = []
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append(lines[i])
+                i += 1
+            if (table := _table(rows)) is None:
+                return None
+            blocks.append(table)
+        else:
+            paragraph = []
+            while i < len(lines) and lines[i].strip():
+                if (text := _inline(lines[i].strip())) is None or lines[i].lstrip()[:1] in "#|-+*<>0123456789":
+                    return None
+                paragraph.append(text)
+                i += 1
+            blocks.append("<p>" + _BREAK.join(paragraph) + "</p>")  # soft line breaks
+
+    # a blank line between bullet items makes a loose list in pandoc
+    for k in range(len(blocks) - 1):
+        if blocks[k].startswith("<ul>") and blocks[k + 1].startswith("<ul>"):
+            return None
+    return "".join(_wrap(line) + "\n" for block in blocks for line in block.split("\n"))
+
+
+def markdown_file_to_html_file(full_md: str, full_html: str) -> bool:
+    """Render a markdown file with `markdown_to_html`.
+
+    Args:
+        full_md (str): Full path of the markdown file.
+        full_html (str): Full path of the html file.
+
+    Returns:
+        bool: Whether the file was rendered, False if it has to be converted by pandoc.
+    """
+    if not os.path.isfile(full_md):
+        return False
+
+    with open(full_md, encoding="utf-8", newline="\n") as f:
+        if (content := markdown_to_html(f.readlines())) is None:
+            return False
+
+    if path_html := os.path.dirname(full_html):
+        os.makedirs(path_html, exist_ok=True)
+    with open(full_html, "w", encoding="utf-8", newline="\n") as f:
+        f.write(content)
+    return True
+
+
+def _inline(text: str) -> str | None:
+    parts: list[str | None] = []
+    start = 0
+    for mch in _REGEX_INLINE.finditer(text):
+        parts.append(_plain(text[start : mch.start()]))
+        link_text, url, strong, emph, code = mch.groups()
+        if url is not None:
+            inner = _inline(link_text) if link_text else ""
+            parts.append(None if inner is None else f'<a{_BREAK}href="{html.escape(url)}">{inner}</a>')
+        elif strong is not None:
+            parts.append(None if (inner := _inline(strong)) is None else f"<strong>{inner}</strong>")
+        elif emph is not None:
+            parts.append(None if (inner := _inline(emph)) is None else f"<em>{inner}</em>")
+        else:
+            parts.append(f"<code>{html.escape(code, quote=False)}</code>")
+        start = mch.end()
+    parts.append(_plain(text[start:]))
+
+    if None in parts:
+        return None
+    return "".join(p for p in parts if p is not None)
+
+
+def _plain(text: str) -> str | None:
+    if _REGEX_UNSUPPORTED.search(text):
+        return None
+    return html.escape(re.sub(r"\s+", _BREAK, text), quote=False)
+
+
+def _wrap(line: str) -> str:
+    # pandoc breaks lines greedily at the marked spaces; longer words are kept whole
+    out: list[str] = []
+    for word in line.split(_BREAK):
+        if out and len(out[-1]) + 1 + len(word) <= _PANDOC_COLUMNS:
+            out[-1] += " " + word
+        else:
+            out.append(word)
+    return "\n".join(out)
+
+
+def _identifier(text: str, ids: dict[str, int]) -> str:
+    # pandoc `auto_identifiers` of the plain text of a heading
+    plain = _REGEX_INLINE.sub(lambda m: next(g for g in m.groups()[:1] + m.groups()[2:] if g is not None), text)
+    identifier = "".join(c for c in plain.lower() if c.isalnum() or c in "_-. ")
+    identifier = re.sub(r"\s+", "-", identifier.strip())
+    identifier = identifier[next((k for k, c in enumerate(identifier) if c.isalpha()), len(identifier)) :]
+    identifier = identifier or "section"
+
+    if identifier in ids:
+        ids[identifier] += 1
+        identifier = f"{identifier}-{ids[identifier]}"
+    else:
+        ids[identifier] = 0
+    return identifier
+
+
+def _table(rows: list[str]) -> str | None:
+    # wide tables are left to pandoc, which sizes their columns (conservatively from the whole line)
+    if any(len(row.rstrip("\r")) >= _PANDOC_COLUMNS for row in rows):
+        return None
+    rows = [row.strip() for row in rows]
+    if len(rows) < 2 or not _REGEX_TABLE_SEPARATOR.match(rows[1]):
+        return None
+
+    def split(row: str) -> list[str]:
+        return [c.strip() for c in row.strip().removeprefix("|").removesuffix("|").split("|")]
+
+    aligns = []
+    for c in split(rows[1]):
+        if c.startswith(":") and c.endswith(":"):
+            aligns.append(f'{_BREAK}style="text-align: center;"')
+        elif c.endswith(":"):
+            aligns.append(f'{_BREAK}style="text-align: right;"')
+        elif c.startswith(":"):
+            aligns.append(f'{_BREAK}style="text-align: left;"')
+        else:
+            aligns.append("")
+
+    def render(cells: list[str], tag: str) -> list[str] | None:
+        cells = (cells + [""] * len(aligns))[: len(aligns)]
+        out = ["<tr>"]
+        for cell, align in zip(cells, aligns, strict=True):
+            if (text := _inline(cell)) is None:
+                return None
+            out.append(f"<{tag}{align}>{text}</{tag}>")
+        out.append("</tr>")
+        return out
+
+    table = ["<table>"]
+    if any(header := split(rows[0])):
+        if (tr := render(header, "th")) is None:
+            return None
+        table.extend(["<thead>", *tr, "</thead>"])
+
+    table.append("<tbody>")
+    for row in rows[2:]:
+        if (tr := render(split(row), "td")) is None:
+            return None
+        table.extend(tr)
+    table.extend(["</tbody>", "</table>"])
+    return "\n".join(table)
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+import pytest
+
+# Modules which the lazy package exports keep out of a bare package import
+HEAVY_MODULES = ["pybibtexer", "pyeasyphd.tools.search"]
+
+
+def _loaded_modules(statement: str) -> list[str]:
+    code = f"{statement}; import sys; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    stdout = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return stdout.split()
+
+
+@pytest.mark.parametrize("statement", ["import pyeasyphd.main", "import pyeasyphd.tools", "import pyeasyphd.scripts"])
+def test_package_import_is_lazy(statement):
+    assert _loaded_modules(statement) == []
+
+
+def test_exports_load_on_access():
+    assert _loaded_modules("from pyeasyphd.scripts import run_replace_to_standard_cite_keys") == ["pybibtexer"]
+
+
+def test_importtime_of_the_scripts_package():
+    cmd = [sys.executable, "-X", "importtime", "-c", "import pyeasyphd.scripts"]
+    stderr = subprocess.run(cmd, capture_output=True, text=True, check=True).stderr
+
+    cumulative = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and not line.endswith("| imported package"):
+            _, us, name = line[len("import time:") :].split("|")
+            cumulative[name.strip()] = int(us)
+
+    assert not [m for m in cumulative for h in HEAVY_MODULES if m == h or m.startswith(h + ".")]
+    # microseconds of the whole package import, generous for slow machines
+    assert cumulative["pyeasyphd.scripts"] < 1_000_000
@@ -0,0 +1,183 @@
+import os
+import stat
+import sys
+
+import pytest
+
+from pyeasyphd.main import latex_builds
+from pyeasyphd.main.latex_builds import LatexJob, compile_latex, latex_preamble_format
+
+# latexmk writing `<name>.pdf` and `<name>.fls` in `-outdir`, with the inputs `% input <file>` lines of the tex
+FAKE_LATEXMK = f"""#!{sys.executable}
+import os, sys, time
+outdir = next(a for a in sys.argv if a.startswith("-outdir="))[8:]
+full_tex = sys.argv[-1]
+name = os.path.splitext(os.path.basename(full_tex))[0]
+with open(full_tex) as f:
+    lines = f.read().splitlines()
+if "% sleep" in lines:
+    time.sleep(30)
+if "% fail" in lines:
+    print("! Undefined control sequence.")
+    sys.exit(12)
+with open(os.environ["FAKE_LATEXMK_RUNS"], "a") as f:
+    f.write(full_tex + "\\n")
+inputs = [full_tex, *(x[8:] for x in lines if x.startswith("% input "))]
+with open(os.path.join(outdir, name + ".fls"), "w") as f:
+    f.write("PWD " + os.getcwd() + "\\n" + "".join("INPUT " + x + "\\n" for x in inputs))
+with open(os.path.join(outdir, name + ".pdf"), "w") as f:
+    f.write("pdf")
+print("Output written on " + name + ".pdf in " + os.getcwd())
+"""
+
+# `engine -ini ... mylatexformat.ltx preamble.tex` dumping `<jobname>.fmt`, with the inputs `% input <file>` lines
+FAKE_ENGINE = f"""#!{sys.executable}
+import os, sys
+name = next(a for a in sys.argv if a.startswith("-jobname="))[9:]
+outdir = next(a for a in sys.argv if a.startswith("-output-directory="))[18:]
+with open(os.environ["FAKE_DUMPS"], "a") as f:
+    f.write(name + "\\n")
+if not os.path.exists(os.environ["FAKE_MYLATEXFORMAT"]):
+    print("! LaTeX Error: File `mylatexformat.ltx' not found.")
+    sys.exit(1)
+with open(sys.argv[-1]) as f:
+    inputs = [sys.argv[-1], os.environ["FAKE_MYLATEXFORMAT"], *(x[8:] for x in f.read().splitlines() if x.startswith("% input "))]
+with open(os.path.join(outdir, name + ".fls"), "w") as f:
+    f.write("PWD " + os.getcwd() + "\\n" + "".join("INPUT " + x + "\\n" for x in inputs))
+with open(os.path.join(outdir, name + ".fmt"), "w") as f:
+    f.write("fmt")
+"""
+
+FAKE_KPSEWHICH = f"""#!{sys.executable}
+import os, sys
+if sys.argv[1].startswith("-expand-var="):
+    print(os.environ["FAKE_TEXMF"])
+elif sys.argv[1] == "mylatexformat.ltx" and os.path.exists(os.environ["FAKE_MYLATEXFORMAT"]):
+    print(os.environ["FAKE_MYLATEXFORMAT"])
+else:
+    sys.exit(1)
+"""
+
+
+def _install(path_bin, name, script):
+    path_bin.mkdir(exist_ok=True)
+    full_script = path_bin / name
+    full_script.write_text(script, encoding="utf-8")
+    full_script.chmod(full_script.stat().st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def latexmk(tmp_path, monkeypatch):
+    path_bin = tmp_path / "bin"
+    _install(path_bin, "latexmk", FAKE_LATEXMK)
+    monkeypatch.setenv("PATH", f"{path_bin}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_LATEXMK_RUNS", str(tmp_path / "runs.log"))
+    return tmp_path / "runs.log"
+
+
+def _document(path, text="Body\n"):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "main.tex").write_text(text, encoding="utf-8")
+    return str(path / "main.tex")
+
+
+def test_compile_in_the_document_directory(tmp_path, latexmk):
+    cwd = os.getcwd()
+    full_tex = _document(tmp_path / "doc")
+    job = LatexJob(full_tex, "xelatex", str(tmp_path / "build"), str(tmp_path / "doc"))
+
+    result = compile_latex(job)
+    assert result.success and not result.skipped
+    assert os.path.exists(job.output(".pdf"))
+    # latexmk ran in the directory of the document, the process kept its directory
+    assert f"in {tmp_path / 'doc'}" in result.log
+    assert os.getcwd() == cwd
+
+
+def test_failures_and_timeouts_are_reported_with_the_log(tmp_path, latexmk):
+    failed = compile_latex(LatexJob(_document(tmp_path / "a", "% fail\n"), "xelatex", str(tmp_path / "a")))
+    assert not failed.success
+    assert "Undefined control sequence" in failed.log
+
+    slow = compile_latex(LatexJob(_document(tmp_path / "b", "% sleep\n"), "xelatex", str(tmp_path / "b"), timeout=1))
+    assert not slow.success
+    assert slow.seconds < 10
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    path_bin, path_texmf = tmp_path / "bin", tmp_path / "texmf"
+    _install(path_bin, "xelatex", FAKE_ENGINE)
+    _install(path_bin, "kpsewhich", FAKE_KPSEWHICH)
+    (path_texmf / "tex").mkdir(parents=True)
+    monkeypatch.setenv("PATH", f"{path_bin}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_DUMPS", str(tmp_path / "dumps.log"))
+    monkeypatch.setenv("FAKE_MYLATEXFORMAT", str(path_texmf / "tex" / "mylatexformat.ltx"))
+    monkeypatch.setenv("FAKE_TEXMF", str(path_texmf))
+    monkeypatch.setattr(latex_builds, "_TEX_TREES", None)
+    return tmp_path / "dumps.log"
+
+
+def _lines(full_log):
+    return len(full_log.read_text(encoding="utf-8").splitlines()) if full_log.exists() else 0
+
+
+def test_preamble_format_is_dumped_again_after_an_own_package_changed(tmp_path, engine):
+    (tmp_path / "texmf" / "tex" / "mylatexformat.ltx").write_text("ltx", encoding="utf-8")
+    (tmp_path / "texmf" / "tex" / "base.sty").write_text("base", encoding="utf-8")
+    (tmp_path / "mine.sty").write_text("mine", encoding="utf-8")
+    preamble = [
+        "\\documentclass{article}\n",
+        f"% input {tmp_path / 'texmf' / 'tex' / 'base.sty'}\n",
+        f"% input {tmp_path / 'mine.sty'}\n",
+    ]
+    path_cache = str(tmp_path / "formats")
+
+    full_fmt = latex_preamble_format(preamble, "xelatex", path_cache)
+    assert full_fmt and os.path.exists(full_fmt + ".fmt")
+    assert latex_preamble_format(preamble, "xelatex", path_cache) == full_fmt
+    # files of the distribution are not followed
+    (tmp_path / "texmf" / "tex" / "base.sty").write_text("base 2", encoding="utf-8")
+    assert latex_preamble_format(preamble, "xelatex", path_cache) == full_fmt
+    assert _lines(engine) == 1
+
+    (tmp_path / "mine.sty").write_text("mine 2", encoding="utf-8")
+    assert latex_preamble_format(preamble, "xelatex", path_cache) == full_fmt
+    assert _lines(engine) == 2
+
+
+def test_failed_dump_is_tried_again_once_mylatexformat_is_installed(tmp_path, engine):
+    preamble = ["\\documentclass{article}\n"]
+    path_cache = str(tmp_path / "formats")
+
+    assert latex_preamble_format(preamble, "xelatex", path_cache) == ""
+    assert latex_preamble_format(preamble, "xelatex", path_cache) == ""
+    assert _lines(engine) == 1
+
+    (tmp_path / "texmf" / "tex" / "mylatexformat.ltx").write_text("ltx", encoding="utf-8")
+    assert latex_preamble_format(preamble, "xelatex", path_cache)
+    assert _lines(engine) == 2
+
+
+def test_build_record_skips_unchanged_inputs_only(tmp_path, latexmk):
+    full_chapter = tmp_path / "doc" / "chapter.tex"
+    full_tex = _document(tmp_path / "doc", f"% input {full_chapter}\n")
+    full_chapter.write_text("Chapter\n", encoding="utf-8")
+    job = LatexJob(full_tex, "xelatex", str(tmp_path / "build"), str(tmp_path / "doc"), incremental=True)
+
+    assert not compile_latex(job).skipped
+    assert compile_latex(job).skipped
+    # touched with the same content
+    os.utime(full_chapter, ns=(full_chapter.stat().st_mtime_ns + 10**9,) * 2)
+    assert compile_latex(job).skipped
+    assert _lines(latexmk) == 1
+
+    # an edited input makes the record stale
+    full_chapter.write_text("Chapter, edited\n", encoding="utf-8")
+    assert not compile_latex(job).skipped
+    assert compile_latex(job).skipped
+    assert _lines(latexmk) == 2
+
+    # so does a missing pdf
+    os.remove(job.output(".pdf"))
+    assert not compile_latex(job).skipped
@@ -0,0 +1,62 @@
+import shutil
+import subprocess
+
+import pytest
+
+from pyeasyphd.utils.markdown_html import markdown_to_html
+
+SAMPLES = {
+    "links": (
+        "# Journals\n\n## IEEE Transactions\n\n"
+        "- [TPAMI](https://example.org/tpami.html)\n"
+        "- [TIT](https://example.org/tit.html) **2024**\n\n"
+        "## IEEE Transactions\n\nSee the *weekly* list in `data`.\n"
+    ),
+    "table": (
+        "## Counts\n\n"
+        "|Keywords Types|Keywords|TIT|TSP|\n"
+        "|-|-|-:|:-:|\n"
+        "|deep|deep learning|3|1|\n"
+        "|graph|graph neural|0|2|\n"
+    ),
+    "wrapped": (
+        "## A heading long enough for pandoc to wrap it at its seventy two columns\n\n"
+        "A paragraph with soft\nline breaks, [a link](https://example.org/"
+        + "a" * 60
+        + ".html) and `code that is not wrapped`.\n"
+    ),
+}
+
+
+def _pandoc(tmp_path, text: str) -> str:
+    full_md, full_html = tmp_path / "in.md", tmp_path / "out.html"
+    full_md.write_text(text, encoding="utf-8")
+    # the command of `PandocMdTo._cmd_md_to_html`
+    subprocess.run(["pandoc", str(full_md), "-o", str(full_html), "--from", "markdown"], check=True)
+    return full_html.read_text(encoding="utf-8")
+
+
+@pytest.mark.skipif(shutil.which("pandoc") is None, reason="pandoc is not installed")
+@pytest.mark.parametrize("name", list(SAMPLES))
+def test_matches_pandoc(tmp_path, name):
+    assert markdown_to_html([SAMPLES[name]]) == _pandoc(tmp_path, SAMPLES[name])
+
+
+def test_table():
+    assert markdown_to_html(["|a|b|\n|-|-:|\n|1|2|\n"]) == (
+        "<table>\n<thead>\n"
+        '<tr>\n<th>a</th>\n<th style="text-align: right;">b</th>\n</tr>\n'
+        "</thead>\n<tbody>\n"
+        '<tr>\n<td>1</td>\n<td style="text-align: right;">2</td>\n</tr>\n'
+        "</tbody>\n</table>\n"
+    )
+
+
+def test_unsupported_markdown_is_left_to_pandoc():
+    # pandoc writes `<colgroup>` widths for pipe tables with lines longer than its columns
+    wide = "|Name|Link|\n|-|-|\n|TPAMI|[x](https://example.org/" + "a" * 80 + ".html)|\n"
+    assert markdown_to_html([wide]) is None
+    assert markdown_to_html(['Smart "quotes" and escapes\\.\n']) is None
+    assert markdown_to_html(["- one\n\n- two\n"]) is None  # loose list
+    assert markdown_to_html(["<details>\n<summary>More</summary>\n</details>\n"]) is None  # raw html
+    assert markdown_to_html(["Caf\u00e9\n"]) is None  # wrapped by display width
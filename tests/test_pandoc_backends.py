@@ -0,0 +1,49 @@
+import base64
+import json
+
+from pyeasyphd.main.pandoc_backends import PandocServer, PandocServerBackend
+from pyeasyphd.main.pandoc_md_to import PandocMdTo
+
+
+def test_citeproc_md_to_md_goes_to_the_server(tmp_path):
+    full_bib = tmp_path / "refs.bib"
+    full_bib.write_text("@misc{a, title = {A}}\n", encoding="utf-8")
+    text = "---\nreference-section-title: Bibliography\n---\n\nSee [@a].\n"
+
+    cmd = ["pandoc", *PandocMdTo({})._args_md_to_md(str(full_bib), "")]
+    request = PandocServerBackend(PandocServer())._to_request(cmd, text)
+
+    assert request is not None
+    _, request = request
+    assert request["citeproc"] is True
+    # appended after the document metadata, which it overrides as `-M` does, with the quotes kept literally
+    assert request["text"].startswith(text)
+    line = '"reference-section-title": "' + "\\\\'References\\\\'" + '"'  # JSON of the markdown \'References\'
+    assert request["text"].endswith(f"---\n{line}\n...\n")
+
+
+def test_files_with_the_same_name_are_kept_apart(tmp_path):
+    (tmp_path / "abbr").mkdir()
+    (tmp_path / "zotero").mkdir()
+    full_abbr, full_zotero = tmp_path / "abbr" / "refs.bib", tmp_path / "zotero" / "refs.bib"
+    full_abbr.write_text("abbr", encoding="utf-8")
+    full_zotero.write_text("zotero", encoding="utf-8")
+
+    cmd = ["pandoc", "--citeproc", f"--bibliography={full_abbr}", f"--bibliography={full_zotero}", "-t", "html"]
+    _, request = PandocServerBackend(PandocServer())._to_request(cmd, "text")
+
+    names = request["bibliography"]
+    assert len(set(names)) == 2
+    assert [base64.b64decode(request["files"][n]) for n in names] == [b"abbr", b"zotero"]
+
+
+def test_metadata_of_json_input(tmp_path):
+    text = '{"pandoc-api-version": [1, 23, 1], "meta": {}, "blocks": []}'
+    cmd = ["pandoc", "-f", "json", "-t", "markdown", "-M", "reference-section-title='References'", "-M", "x="]
+    _, request = PandocServerBackend(PandocServer())._to_request(cmd, text)
+
+    assert request["from"] == "json"
+    assert json.loads(request["text"])["meta"] == {
+        "reference-section-title": {"t": "MetaString", "c": "'References'"},
+        "x": {"t": "MetaBool", "c": True},
+    }
@@ -0,0 +1,83 @@
+from pyadvtools import read_list
+from pybibtexer.bib.core.convert_str_to_library import ConvertStrToLibrary
+
+from pyeasyphd.main.pandoc_bibliography import cited_bibliography, index_bibliography
+
+BIB = """@String{ieee = "IEEE Press"}
+@string(acm = {ACM})
+
+@comment{
+@article{commented,
+  title = {Inside a comment},
+}
+}
+
+@Book{parent,
+  title = {Parent},
+  publisher = ieee,
+}
+
+@InCollection{child,
+  crossref = {parent},
+  title = {Child with {braces} and a@b.com},
+}
+Implicit comment text. @misc{inline, title = {Inline}, publisher = acm}
+@preamble{"\\newcommand{\\x}{x}"}
+@article{dup, title = {First}}
+@article{dup, title = {Second}}
+"""
+
+
+def _fields(full_bib: str) -> dict[str, dict[str, str]]:
+    library = ConvertStrToLibrary().generate_library(read_list(full_bib, "r"))
+    return {entry.key: {field.key: field.value for field in entry.fields} for entry in library.entries}
+
+
+def _no_pandoc(cmd: list[str], text: str, error_flag: str) -> str:
+    return ""
+
+
+def test_index_bibliography_matches_pybibtexer(tmp_path):
+    full_bib = tmp_path / "refs.bib"
+    full_bib.write_text(BIB, encoding="utf-8")
+
+    _, common, entries = index_bibliography(str(full_bib))
+    assert len(common) == 3  # two `@string` blocks and the `@preamble`
+
+    # pybibtexer also reads entries inside `@comment{...}`, which BibTeX-style parsers such as pandoc skip
+    assert set(entries) == set(_fields(str(full_bib))) - {"commented"}
+    assert "Inside a comment" not in "".join(entries.values())
+
+
+def test_cited_bibliography_matches_pybibtexer(tmp_path):
+    full_bib = tmp_path / "refs.bib"
+    full_bib.write_text(BIB, encoding="utf-8")
+    full_fields = _fields(str(full_bib))
+
+    text = "See [@child; @inline; @dup]."
+    full_subset = cited_bibliography(str(full_bib), text, str(tmp_path / "store"), _no_pandoc)
+    subset_fields = _fields(full_subset)
+
+    # the crossref parent is added, and all `@string` blocks are kept for the macros
+    assert set(subset_fields) == {"parent", "child", "inline", "dup"}
+    with open(full_subset, encoding="utf-8") as f:
+        subset = f.read()
+    assert '@String{ieee = "IEEE Press"}' in subset and "@string(acm = {ACM})" in subset
+    for key, fields in subset_fields.items():
+        assert fields == full_fields[key]
+
+
+def test_index_bibliography_parenthesized_entry(tmp_path):
+    full_bib = tmp_path / "refs.bib"
+    full_bib.write_text(
+        '@article(paren, title = {Parenthesized (entry)}, note = "A (b) c) d")\n'
+        '@misc{next, title = "Quoted {\\"o} ) and {braces}"}\n'
+        "@misc{last, title = {Last}}\n"
+    )
+
+    _, _, entries = index_bibliography(str(full_bib))
+    assert entries == {
+        "paren": '@article(paren, title = {Parenthesized (entry)}, note = "A (b) c) d")\n',
+        "next": '@misc{next, title = "Quoted {\\"o} ) and {braces}"}\n',
+        "last": "@misc{last, title = {Last}}\n",
+    }
@@ -0,0 +1,79 @@
+import os
+
+from pyeasyphd.main.pandoc_cache import PandocCache
+
+
+def _markdown(tmp_path, text: str = "# Title\n"):
+    full_md = tmp_path / "a.md"
+    full_md.write_text(text, encoding="utf-8")
+    return str(full_md)
+
+
+def test_hit_and_miss(tmp_path):
+    cache = PandocCache(str(tmp_path / "cache"), 1024 * 1024)
+    full_md = _markdown(tmp_path)
+    full_html = str(tmp_path / "a.html")
+    key = cache.key(["pandoc", full_md, "-o", full_html])
+
+    assert key
+    assert not cache.get(key, full_html)
+    with open(full_html, "w", encoding="utf-8") as f:
+        f.write("<h1>Title</h1>\n")
+    cache.put(key, full_html)
+
+    os.remove(full_html)
+    assert cache.get(key, full_html)
+    with open(full_html, encoding="utf-8") as f:
+        assert f.read() == "<h1>Title</h1>\n"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_follows_file_contents_not_paths(tmp_path):
+    cache = PandocCache(str(tmp_path / "cache"), 1024 * 1024)
+    full_md = _markdown(tmp_path)
+    key = cache.key(["pandoc", full_md, "-o", str(tmp_path / "a.html")])
+
+    assert key == cache.key(["pandoc", full_md, "-o", str(tmp_path / "other" / "b.html")])
+    _markdown(tmp_path, "# Changed\n")
+    assert key != cache.key(["pandoc", full_md, "-o", str(tmp_path / "a.html")])
+
+
+def test_piped_text(tmp_path):
+    cache = PandocCache(str(tmp_path / "cache"), 1024 * 1024)
+    key = cache.key(["pandoc", "-t", "markdown"], "See [@a].")
+
+    assert cache.get_text(key) is None
+    cache.put_text(key, "See (A 2020).\n")
+    assert cache.get_text(key) == "See (A 2020).\n"
+    assert key != cache.key(["pandoc", "-t", "markdown"], "See [@b].")
+
+
+def test_outputs_embedding_images_are_not_cached(tmp_path):
+    cache = PandocCache(str(tmp_path / "cache"), 1024 * 1024)
+    full_md = _markdown(tmp_path, "![figure](figure.png)\n")
+
+    assert cache.key(["pandoc", full_md, "-o", str(tmp_path / "a.pdf")]) == ""
+    assert cache.key(["pandoc", full_md, "-o", str(tmp_path / "a.docx")]) == ""
+    assert cache.key(["pandoc", full_md, "-o", str(tmp_path / "a.html"), "--embed-resources"]) == ""
+    assert cache.key(["pandoc", full_md, "-o", str(tmp_path / "a.html")])
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    path_cache = tmp_path / "cache"
+    (path_cache / "bibliography").mkdir(parents=True)
+    (path_cache / "bibliography" / "kept.json").write_text("x" * 100, encoding="utf-8")
+    cache = PandocCache(str(path_cache), 25)
+
+    for i, key in enumerate(["aa1", "bb2", "cc3"]):
+        cache.put_text(key, "0123456789")
+        os.utime(cache._full_entry(key), (i, i))
+    assert cache.get_text("bb2") is not None  # now the most recently used
+    cache.put_text("dd4", "0123456789")
+
+    assert cache.get_text("aa1") is None
+    assert cache.get_text("cc3") is None
+    assert cache.get_text("bb2") == cache.get_text("dd4") == "0123456789"
+    # other stores in the cache directory are neither counted, evicted nor cleared
+    cache.clear()
+    assert (path_cache / "bibliography" / "kept.json").exists()
+    assert cache.get_text("bb2") is None
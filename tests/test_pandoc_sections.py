@@ -0,0 +1,50 @@
+import shutil
+
+import pytest
+
+from pyeasyphd.main.pandoc_md_to import PandocMdTo
+
+BIB = (
+    "@article{a, author = {Alpha, A}, title = {T1}, journal = {J}, year = {2020}}\n"
+    "@article{b, author = {Alpha, A}, title = {T2}, journal = {J}, year = {2020}}\n"
+    "@article{c, author = {Gamma, C}, title = {T3}, journal = {J}, year = {2021}}\n"
+)
+SECTIONS = [
+    ["## Notes\n", "\n", "See [@a] and a note.[^1]\n", "\n", "[^1]: First note.\n"],
+    ["## Notes\n", "\n", "See [@b] and [@a].[^2]\n", "\n", "[^2]: Second note.\n"],
+    ["\n", "---\n", "nocite: |\n", "  @c\n", "...\n"],
+]
+
+
+@pytest.mark.skipif(shutil.which("pandoc") is None, reason="pandoc is not installed")
+def test_sections_convert_as_one_document(tmp_path):
+    full_bib = tmp_path / "refs.bib"
+    full_bib.write_text(BIB, encoding="utf-8")
+    pandoc_md_to = PandocMdTo({"pandoc_cache_path": str(tmp_path / "cache")})
+
+    one_pass = pandoc_md_to.pandoc_md_to_md_piped(str(full_bib), [line for s in SECTIONS for line in [*s, "\n"]])
+    for _ in range(2):  # the second time from the cached sections
+        data_list = pandoc_md_to.pandoc_md_to_md_sections(str(full_bib), SECTIONS)
+        assert data_list == one_pass
+
+    text = "".join(data_list)
+    # year suffixes, one entry per reference and footnotes of the whole document
+    assert "2020a" in text and "2020b" in text
+    assert text.count('id="ref-a"') == text.count('id="ref-c"') == 1
+    assert "[^2]: Second note." in text
+
+
+def test_repeated_identifiers_are_numbered():
+    blocks = [
+        {"t": "Header", "c": [2, ["notes", [], []], []]},
+        {"t": "Div", "c": [["", [], []], [{"t": "Header", "c": [2, ["notes", [], []], []]}]]},
+        {"t": "Header", "c": [2, ["notes", [], []], []]},
+        {"t": "Header", "c": [2, ["", [], []], []]},
+    ]
+    PandocMdTo._unique_identifiers(blocks)
+    assert [e["c"][1][0] for e in PandocMdTo._walk_json(blocks) if e["t"] == "Header"] == [
+        "notes",
+        "notes-1",
+        "notes-2",
+        "",
+    ]
@@ -0,0 +1,76 @@
+from pybibtexer.bib.bibtexparser import Entry, Field, Library
+
+from pyeasyphd.tools.search.hit_matrix import HitMatrix
+from pyeasyphd.tools.search.search_base import SearchHitsCache, clear_search_hits_cache, search_keywords_core
+
+
+def _entry(key: str, title: str) -> Entry:
+    return Entry("article", key, [Field("title", title)])
+
+
+YEAR_ENTRIES = {
+    "2020": [_entry("a20", "Deep learning"), _entry("b20", "Graph theory")],
+    "2021": [_entry("a21", "Deep reinforcement learning"), _entry("b21", "Learning to rank")],
+}
+
+
+def _cache(path_cache: str) -> SearchHitsCache:
+    return SearchHitsCache("TIT", "article", YEAR_ENTRIES, ["title"], "plan", path_cache)
+
+
+def _library() -> Library:
+    return Library([entry for entries in YEAR_ENTRIES.values() for entry in entries])
+
+
+def test_search_hits_cache_matches_search_and_is_reused(tmp_path):
+    clear_search_hits_cache()
+    keywords = [["deep"], ["reinforcement"]]
+    expected, _ = search_keywords_core(keywords, _library(), "title")
+
+    cache = _cache(str(tmp_path))
+    found, remaining = cache.search("t", "deep", keywords, _library(), "title")
+    assert [e.key for e in found.entries] == [e.key for e in expected.entries] == ["a20"]
+    assert {e.key for e in remaining.entries} == {"b20", "a21", "b21"}
+    assert (cache.hit_years, cache.searched_years) == (0, 2)
+    cache.save()
+
+    # a new process only has the cache file
+    clear_search_hits_cache()
+    cache = _cache(str(tmp_path))
+    found, _ = cache.search("t", "deep", keywords, _library(), "title")
+    assert [e.key for e in found.entries] == ["a20"]
+    assert (cache.hit_years, cache.searched_years) == (2, 0)
+
+
+def test_search_hits_cache_searches_changed_years_again(tmp_path):
+    clear_search_hits_cache()
+    _cache(str(tmp_path)).search("t", "learning", [["learning"]], _library(), "title")
+
+    YEAR_ENTRIES["2021"].append(_entry("c21", "Learning theory"))
+    try:
+        cache = _cache(str(tmp_path))
+        found, _ = cache.search("t", "learning", [["learning"]], _library(), "title")
+    finally:
+        YEAR_ENTRIES["2021"].pop()
+    assert {e.key for e in found.entries} == {"a20", "a21", "b21", "c21"}
+    assert (cache.hit_years, cache.searched_years) == (1, 1)
+
+
+def test_hit_matrix_counts_and_round_trip(tmp_path):
+    clear_search_hits_cache()
+    cache = _cache("")
+    cache.search("t", "learning", [["learning"]], _library(), "title")
+    cache.search("t", "learning", [["deep"]], _library(), "title")  # a later search of the same keyword
+
+    hit_matrix = HitMatrix()
+    hit_matrix.extend(cache.hit_matrix, publisher="IEEE")
+    assert hit_matrix.group_by("year") == {("2020",): 2, ("2021",): 3}
+    assert hit_matrix.group_by("keyword", last=("publisher", "search")) == {("learning",): 2}
+
+    full_json = str(tmp_path / "hit_matrix.json")
+    hit_matrix.save(full_json)
+    loaded = HitMatrix.load(full_json)
+    assert len(loaded) == len(hit_matrix) == 4
+    for columns in [("publisher", "venue"), ("year", "keyword", "search"), ("entry_type", "field", "keywords_type")]:
+        assert loaded.group_by(*columns) == hit_matrix.group_by(*columns)
+    assert len(HitMatrix.load(str(tmp_path / "missing.json"))) == 0
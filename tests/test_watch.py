@@ -0,0 +1,64 @@
+import os
+import time
+
+from pyeasyphd.tools.py_run_bib_md_tex import PyRunBibMdTex
+
+
+def _tree(tmp_path):
+    (tmp_path / "figs").mkdir()
+    (tmp_path / "figs" / "plot.png").write_bytes(b"v1")
+    (tmp_path / "refs.bib").write_text("@article{Alpha, title = {T}, journal = {J}, year = {2020}}\n", encoding="utf-8")
+    (tmp_path / "main.tex").write_text("See \\cite{alpha}.\n\\includegraphics{plot.png}\n", encoding="utf-8")
+    options = {
+        "bib_path_or_file": str(tmp_path / "refs.bib"),
+        "includegraphics_figs_directory": str(tmp_path / "figs"),
+        "generate_tex": False,
+    }
+    return PyRunBibMdTex(str(tmp_path / "out"), ".tex", "paper", options)
+
+
+def _touch(full_file, content):
+    # a later modification time even on file systems with a coarse clock
+    mtime_ns = full_file.stat().st_mtime_ns + 10**9
+    full_file.write_bytes(content)
+    os.utime(full_file, ns=(mtime_ns, mtime_ns))
+
+
+def test_keys_are_matched_case_insensitively(tmp_path):
+    runner = _tree(tmp_path)
+    library = runner._warm_library_copy(str(tmp_path / "refs.bib"), ["alpha"])
+    assert [e.key for e in library.entries] == ["Alpha"]
+
+
+def test_watch_rebuilds_what_changed_and_survives_failures(tmp_path, monkeypatch):
+    runner = _tree(tmp_path)
+    run_files, builds, libraries = runner.run_files, [], []
+
+    def counting_run_files(*args):
+        builds.append(len(builds))
+        if len(builds) == 2:
+            raise RuntimeError("broken build")
+        result = run_files(*args)
+        libraries.append(runner._warm_library[1])
+        return result
+
+    full_figure = tmp_path / "out" / "main" / "plot.png"
+    edits = [
+        lambda: _touch(tmp_path / "figs" / "plot.png", b"v2"),  # figures only
+        lambda: _touch(tmp_path / "main.tex", b"See \\cite{alpha} again.\n\\includegraphics{plot.png}\n"),
+        lambda: _touch(tmp_path / "main.tex", b"See \\cite{alpha} once more.\n\\includegraphics{plot.png}\n"),
+    ]
+
+    def sleep(_):
+        edits.pop(0)()
+
+    monkeypatch.setattr(runner, "run_files", counting_run_files)
+    monkeypatch.setattr(time, "sleep", sleep)
+    runner.watch([str(tmp_path / "main.tex")], max_rebuilds=4)
+
+    assert not edits
+    # the first build, a failed build and one after it, but none for the figure
+    assert len(builds) == 3
+    assert full_figure.read_bytes() == b"v2"
+    # the unchanged bib file was parsed once
+    assert len(libraries) == 2 and libraries[0] is libraries[1]